@@ -0,0 +1,107 @@
+# Allocation benchmark of the fact-check inner loop, traced with tracemalloc, for the default path and the hot path
+# (Simulator.hot_path) side by side.
+#
+#     python benchmarks/allocations.py [--source game-theory.py] [--agents 100] [--days 20] [--evidence 20]
+#
+# Every FactChecker.fact_check call is measured on its own:
+#   - peak: the most memory the fact-check had allocated at any moment above what was allocated when it started.
+#     Short-lived allocations (lists of found evidence, new mask and score arrays, np.where temporaries, ...) all
+#     count while they are alive, so this is the scratch memory a fact-check allocates and frees again.
+#   - kept blocks: memory blocks allocated from game-theory.py that are still alive after the fact-check
+#     (arguments, votes and growing arrays that the simulation keeps), counted on a sample of fact-checks.
+# numpy calls allocate small objects of their own, so neither path gets to zero. The difference between the paths is
+# what the workspace saves, and it grows with the number of evidence per topic (--evidence).
+# The fact-checks are reported in quarters of the run. Flat numbers from the first to the last quarter mean the
+# inner loop does not allocate more as the run goes on.
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tracemalloc
+
+import numpy as np
+
+
+def load_game(path):
+    spec = importlib.util.spec_from_file_location('game_theory', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['game_theory'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(game, hot_path, args):
+    fact_check = game.FactChecker.fact_check
+    source_filter = [tracemalloc.Filter(True, game.__file__)]
+    records = []
+
+    def measured_fact_check(fc, *call_args):
+        sampled = len(records) % args.sample_every == 0
+        if sampled:
+            before = tracemalloc.take_snapshot().filter_traces(source_filter)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        fact_check(fc, *call_args)
+        peak = tracemalloc.get_traced_memory()[1] - start
+        blocks = np.nan
+        if sampled:
+            after = tracemalloc.take_snapshot().filter_traces(source_filter)
+            blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+        records.append((fc.vote_store.num_votes, peak, blocks))
+
+    game.FactChecker.fact_check = measured_fact_check
+    game.Simulator.hot_path = hot_path
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    s = game.Simulator()
+    tracemalloc.start()
+    try:
+        s.run_simulation()
+    finally:
+        tracemalloc.stop()
+        game.FactChecker.fact_check = fact_check
+    return np.array(records, dtype=float)
+
+
+def main():
+    default_source = os.path.join(os.path.dirname(
+        os.path.abspath(__file__)), '..', 'game-theory.py')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', default=default_source)
+    parser.add_argument('--agents', type=int, default=100)
+    parser.add_argument('--days', type=int, default=20)
+    parser.add_argument('--evidence', type=int, default=20,
+                        help='true and fake evidence per topic')
+    parser.add_argument('--sample-every', type=int, default=25,
+                        help='count blocks on every n-th fact-check')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = load_game(args.source)
+    game.Simulator.num_fact_checkers = args.agents
+    game.Simulator.total_days = args.days
+    game.Topic.num_true_evidence = args.evidence
+    game.Topic.num_fake_evidence = args.evidence
+    results = {'default': measure(game, False, args),
+               'hot': measure(game, True, args)}
+
+    print('%d agents, %d days, %d evidence per topic' %
+          (args.agents, args.days, 2 * args.evidence))
+    print('%-9s %14s %14s %16s %16s' % ('quarter', 'default peak', 'hot peak',
+                                        'default blocks', 'hot blocks'))
+    print('%-9s %14s %14s %16s %16s' %
+          ('', 'B/check', 'B/check', 'kept/check', 'kept/check'))
+    quarters = {name: np.array_split(records, 4)
+                for name, records in results.items()}
+    for q in range(4):
+        default, hot = quarters['default'][q], quarters['hot'][q]
+        print('%-9d %14.0f %14.0f %16.1f %16.1f' % (q + 1, default[:, 1].mean(), hot[:, 1].mean(),
+                                                    np.nanmean(default[:, 2]), np.nanmean(hot[:, 2])))
+    for name, records in results.items():
+        print('%s path: %d fact-checks, %d votes' %
+              (name, len(records), records[-1, 0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Memory benchmark of the object model: bytes per topic and per argument after a 1000-agent run.
+#
+#     python benchmarks/memory_model.py [--source game-theory.py] [--agents 1000] [--days 12]
+#
+# Sizes are deep sizes: an object, its attribute storage and the containers/values it owns. Fact-checkers and the
+# vote store are shared by the whole run and are not counted. Objects reachable from several topics or arguments
+# (e.g. interned evidence) are only counted once, so shared data is spread over all topics/arguments.
+# Pass --source with an older game-theory.py to compare object models.
+import argparse
+import gc
+import importlib.util
+import os
+import random
+import sys
+
+import numpy as np
+
+
+def load_game(path):
+    spec = importlib.util.spec_from_file_location('game_theory', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['game_theory'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def deep_size(objects, seen, excluded_types):
+    size = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, excluded_types) or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+def main():
+    default_source = os.path.join(os.path.dirname(
+        os.path.abspath(__file__)), '..', 'game-theory.py')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', default=default_source)
+    parser.add_argument('--agents', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = load_game(args.source)
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    game.Simulator.num_fact_checkers = args.agents
+    game.Simulator.total_days = args.days
+    s = game.Simulator()
+    s.run_simulation()
+
+    topics = list(s.all_topics)
+    arguments = [a for t in topics for a in t.arguments]
+    shared = tuple(t for t in (game.FactChecker, getattr(game, 'VoteStore', None), type(sys), type(main))
+                   if t is not None)
+
+    # Topics own their evidence, so they are measured first and arguments only pay for what they add
+    seen = set()
+    topic_bytes = deep_size(topics, seen, shared + (game.Argument,))
+    argument_bytes = deep_size(arguments, seen, shared + (game.Topic,))
+
+    print('source:', os.path.relpath(args.source))
+    print('topics: %d, arguments: %d' % (len(topics), len(arguments)))
+    print('bytes per topic:    %.0f' % (topic_bytes / max(len(topics), 1)))
+    print('bytes per argument: %.0f' % (argument_bytes / max(len(arguments), 1)))
+
+
+if __name__ == '__main__':
+    main()
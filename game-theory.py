@@ -45,47 +45,239 @@ import matplotlib.pyplot as plt
 
 # Step 1: Define topic structure
 
-important_votes = []
-all_times = []
+
+# Step 0: Define running statistics
+class OnlineStatistics:
+    # Totals that are updated as each topic settles (see Topic.distribute_rewards), so that results and plots
+    # do not need to keep every topic in memory. Their memory does not grow with the length of the run.
+    bins = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0001]  # initial reward bins
+
+    def __init__(self):
+        num_bins = len(self.bins) - 1
+        self.outcome_counts = np.zeros(4, dtype=np.int64)  # indexed by Topic.outcome()
+        self.binned_outcomes = np.zeros((num_bins, 4), dtype=np.int64)
+        self.binned_votes = np.zeros(num_bins, dtype=np.int64)
+        # honest probability (profile[0]) -> [votes, votes won, ether staked, ether rewarded, reputation change]
+        self.strategy_classes = {}
+
+    def record_topic(self, topic, num_votes):
+        outcome = topic.outcome()
+        self.outcome_counts[outcome] += 1
+        i = np.searchsorted(self.bins, topic.initial_reward, side='right') - 1
+        if 0 <= i < len(self.binned_votes):
+            self.binned_outcomes[i, outcome] += 1
+            self.binned_votes[i] += num_votes
+
+    def record_vote(self, user, won, eth, reward, rep_change):
+        totals = self.strategy_classes.get(user.profile[0])
+        if totals is None:
+            totals = self.strategy_classes[user.profile[0]] = [0, 0, 0, 0, 0]
+        totals[0] += 1
+        totals[1] += won
+        totals[2] += eth
+        totals[3] += reward
+        totals[4] += rep_change
+
+    def success_rates(self):
+        topics = self.binned_outcomes.sum(axis=1)
+        return np.divide(self.binned_outcomes[:, 0], topics, out=np.zeros(len(topics)), where=topics > 0)
+
+    def average_votes(self):
+        topics = self.binned_outcomes.sum(axis=1)
+        return np.divide(self.binned_votes, topics, out=np.zeros(len(topics)), where=topics > 0)
+
+    def strategy_summaries(self):
+        summaries = {}
+        for honest_prob, (votes, won, staked, rewarded, rep_change) in self.strategy_classes.items():
+            summaries[honest_prob] = {'votes': votes, 'win_rate': won / votes, 'ether_staked': staked,
+                                      'ether_rewarded': rewarded, 'mean_rep_change': rep_change / votes}
+        return summaries
+
+
+# Step 0.5: Define shared vote storage
+class VoteStore:
+    # Every vote of a run is one row in a set of parallel (COO-style) arrays: agent, topic, side, ether and reputation.
+    # Votes on topics that have not been settled yet are "open". Only open votes are needed to pick topics and to value a
+    # fact-checker's wallet, so the membership set and the per-agent sums only track those.
+    # The whole-store queries (topic_vote_counts, topic_totals, to_csr) cover the rows that are kept: every vote, or
+    # with keep_settled=False only the open votes and the votes of the last settle_topics call.
+    initial_capacity = 1024
+
+    def __init__(self, keep_settled=True):
+        self.keep_settled = keep_settled  # False: drop settled votes to bound memory in very long runs
+        self.num_votes = 0
+        self.agent = np.empty(self.initial_capacity, dtype=np.int32)
+        self.topic = np.empty(self.initial_capacity, dtype=np.int32)
+        self.side = np.empty(self.initial_capacity, dtype=bool)  # True = voted for the truth
+        self.eth = np.empty(self.initial_capacity, dtype=np.float64)
+        self.rep = np.empty(self.initial_capacity, dtype=np.float64)
+
+        self.agents = []  # fact-checkers indexed by identification
+        self.open_votes = set()  # (agent, topic) pairs of open votes
+        self.open_rows = np.empty(0, dtype=np.int64)
+        self.new_rows_start = 0  # rows at or after this index are open but not in open_rows yet
+        self.open_eth = np.zeros(0)
+        self.open_rep = np.zeros(0)
+
+    def register_agent(self, fact_checker):
+        if fact_checker.identification >= len(self.agents):
+            self.agents.extend(
+                [None] * (fact_checker.identification + 1 - len(self.agents)))
+            self.open_eth = np.append(self.open_eth, np.zeros(
+                len(self.agents) - len(self.open_eth)))
+            self.open_rep = np.append(self.open_rep, np.zeros(
+                len(self.agents) - len(self.open_rep)))
+        self.agents[fact_checker.identification] = fact_checker
+
+    def add(self, agent, topic, side, eth, rep):
+        if self.num_votes == len(self.agent):
+            self.grow()
+
+        i = self.num_votes
+        self.agent[i] = agent
+        self.topic[i] = topic
+        self.side[i] = side
+        self.eth[i] = eth
+        self.rep[i] = rep
+        self.num_votes += 1
+
+        self.open_votes.add((agent, topic))
+        self.open_eth[agent] += eth
+        self.open_rep[agent] += rep
+
+    def grow(self):
+        capacity = 2 * len(self.agent)
+        for name in ('agent', 'topic', 'side', 'eth', 'rep'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def has_voted(self, agent, topic):
+        # Only answers for topics that have not been settled yet
+        return (agent, topic) in self.open_votes
+
+    def open_position(self, agent):
+        # Ether and reputation the fact-checker has locked in topics that have not been settled yet
+        return self.open_eth[agent], self.open_rep[agent]
+
+    def settle_topics(self, topic_ids):
+        # Close all open votes on the given topics. Returns the vote rows of each topic (in the order given).
+        # The rows stay valid until the next call.
+        if not self.keep_settled:
+            self.compact()
+        new_rows = np.arange(self.new_rows_start, self.num_votes)
+        self.open_rows = np.concatenate((self.open_rows, new_rows))
+        self.new_rows_start = self.num_votes
+
+        topic_ids = np.asarray(topic_ids, dtype=np.int64)
+        settled = np.isin(self.topic[self.open_rows], topic_ids)
+        rows = self.open_rows[settled]
+        self.open_rows = self.open_rows[~settled]
+
+        agents = self.agent[rows]
+        np.subtract.at(self.open_eth, agents, self.eth[rows])
+        np.subtract.at(self.open_rep, agents, self.rep[rows])
+        for a, t in zip(agents.tolist(), self.topic[rows].tolist()):
+            self.open_votes.discard((a, t))
+
+        # Group the rows by topic while keeping the order in which the votes were cast
+        rows = rows[np.argsort(self.topic[rows], kind='stable')]
+        bounds = np.searchsorted(self.topic[rows], topic_ids)
+        ends = np.searchsorted(self.topic[rows], topic_ids, side='right')
+        return [rows[b:e] for b, e in zip(bounds, ends)]
+
+    def open_vote_rows(self):
+        # Rows of all open votes
+        return np.concatenate(
+            (self.open_rows, np.arange(self.new_rows_start, self.num_votes)))
+
+    def compact(self):
+        # Keep only the open votes
+        rows = self.open_vote_rows()
+        for name in ('agent', 'topic', 'side', 'eth', 'rep'):
+            column = getattr(self, name)
+            column[:len(rows)] = column[rows]
+        self.num_votes = len(rows)
+        self.open_rows = np.arange(len(self.open_rows))
+        self.new_rows_start = len(self.open_rows)
+
+    def topic_vote_counts(self, num_topics):
+        return np.bincount(self.topic[:self.num_votes], minlength=num_topics)
+
+    def topic_totals(self, num_topics):
+        # Per-topic (ether for truth, ether for lie, rep for truth, rep for lie)
+        n = self.num_votes
+        side = self.side[:n]
+        topic = self.topic[:n]
+        return (np.bincount(topic, weights=np.where(side, self.eth[:n], 0), minlength=num_topics),
+                np.bincount(topic, weights=np.where(side, 0, self.eth[:n]), minlength=num_topics),
+                np.bincount(topic, weights=np.where(side, self.rep[:n], 0), minlength=num_topics),
+                np.bincount(topic, weights=np.where(side, 0, self.rep[:n]), minlength=num_topics))
+
+    def to_csr(self):
+        # Agent x topic matrix in CSR form: the topics agent a voted on are topic[indptr[a]:indptr[a + 1]]
+        n = self.num_votes
+        order = np.argsort(self.agent[:n], kind='stable')
+        counts = np.bincount(self.agent[:n], minlength=len(self.agents))
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return indptr, self.topic[:n][order], self.side[:n][order], self.eth[:n][order], self.rep[:n][order]
 
 
 class Topic:
-    reward_pool = 0
-    start_date = 0
-    end_date = 0
-
-    voters = {}
-    arguments = []
-    ether_for_lie = 0
-    ether_for_truth = 0
-    rep_for_lie = 0
-    rep_for_truth = 0
-    lie_votes = 0
-    true_votes = 0
-    initial_reward = 0
+    # Attributes are listed in __slots__ (no per-instance __dict__). Topics refer to the shared, interned evidence
+    # catalog instead of owning copies of the evidence.
+    __slots__ = ('reward_pool', 'initial_reward', 'start_date', 'end_date', 'identifier', 'vote_store',
+                 'evidence_catalog', 'all_evidence', 'evidence_validity', 'max_confidence', 'arguments', 'argument_counts',
+                 'argument_evidence', 'ether_for_lie', 'ether_for_truth', 'rep_for_lie', 'rep_for_truth',
+                 'lie_votes', 'true_votes')
 
     # evidence
-    all_evidence = []
-    max_confidence = [0, 0]  # [True, False]
+    num_true_evidence = 20
+    num_fake_evidence = 20
+    # Large-catalog mode: sample found evidence from the catalog index instead of a draw per round and item.
+    # Same model, but the cost follows the evidence found instead of rounds x catalog size.
+    indexed_evidence_search = False
 
-    def __init__(self, initial_value, start_date, end_date, identifier):
+    def __init__(self, initial_value, start_date, end_date, identifier, vote_store):
         self.reward_pool = initial_value
         self.initial_reward = initial_value
 
         self.start_date = start_date
         self.end_date = end_date
-        self.all_evidence = list()
-        self.max_confidence = [0, 0]
-        self.voters = {}
+        self.vote_store = vote_store
         self.initialize_available_evidence()
         self.identifier = identifier
         self.arguments = []
+        # Per side (0 = truth, 1 = lie): number of arguments and the evidence used by them
+        self.argument_counts = [0, 0]
+        self.argument_evidence = np.zeros(
+            (2, len(self.all_evidence)), dtype=bool)
+
+        self.ether_for_lie = 0
+        self.ether_for_truth = 0
+        self.rep_for_lie = 0
+        self.rep_for_truth = 0
+        self.lie_votes = 0
+        self.true_votes = 0
 
     def is_expired(self, date):
         return date >= self.end_date
 
-    def distribute_rewards(self):
+    # 0 = truth won, 1 = lie won, 2 = tie, 3 = no votes
+    def outcome(self):
+        if self.true_votes == 0 and self.lie_votes == 0:
+            return 3
+        elif self.true_votes > self.lie_votes:
+            return 0
+        elif self.lie_votes > self.true_votes:
+            return 1
+        return 2
+
+    # vote_rows are the rows of this topic's votes in the vote store
+    def distribute_rewards(self, vote_rows, statistics):
         final_reward_pool = self.reward_pool
+        statistics.record_topic(self, len(vote_rows))
 
         # No one participated
         if (self.lie_votes + self.true_votes == 0):
@@ -97,25 +289,30 @@ class Topic:
         investments = []
         total_eth = self.ether_for_lie if self.lie_votes > self.true_votes else self.ether_for_truth
 
-        for key, value in self.voters.items():
-            # print('self.voters', key, value)
-            user, arg, eth, rep = value
-            # print('arg validity', arg.validity,
+        store = self.vote_store
+        for agent, validity, eth, rep in zip(store.agent[vote_rows].tolist(), store.side[vote_rows].tolist(),
+                                             store.eth[vote_rows].tolist(), store.rep[vote_rows].tolist()):
+            user = store.agents[agent]
+            # print('arg validity', validity,
             #   self.true_votes, self.lie_votes)
 
-            if (arg.validity == True and self.true_votes > self.lie_votes) or (arg.validity == False and self.lie_votes > self.true_votes):
+            rep_before = user.rep
+            if (validity == True and self.true_votes > self.lie_votes) or (validity == False and self.lie_votes > self.true_votes):
                 # print('user id', user.identification,
                 #       'rep', user.rep, 'eth', user.ether)
-                user.ether += self.calculate_eth_reward(
+                reward = self.calculate_eth_reward(
                     eth, total_eth, final_reward_pool)
+                user.ether += reward
                 user.rep += 1.1 * rep
                 user.rep = min(user.rep, 1000)
                 # print('user', user.identification, user.rep, user.ether)
                 total_num_winners += 1
                 total_investment += eth
                 investments.append(eth)
+                statistics.record_vote(user, True, eth, reward, user.rep - rep_before)
             else:
                 user.rep += 0.8 * rep
+                statistics.record_vote(user, False, eth, 0, user.rep - rep_before)
 
         # print('Make sure distribution == one', total_num_winners,
         #       investments, total_investment, total_eth)
@@ -129,30 +326,12 @@ class Topic:
 
     # Step 8: Define evidence creation
     def initialize_available_evidence(self):
-        # Meaningful fact-checks include information that is corect but difficult to find.
-        # Fact-checks easy to verify are not included.
-        index = 0
-        num_fake_evidence = 20
-        num_true_evidence = 20
-        for i in range(1, num_true_evidence + 1):
-            difficulty = math.pow(i/num_true_evidence, 2)
-            # difficulty = i/num_true_evidence
-            value = 1 - math.log(difficulty)  # + 0.01
-            e = Evidence(index, True, difficulty, value)
-            self.max_confidence[0] += value
-            self.all_evidence.append(e)
-            index += 1
-
-        for i in range(1, num_fake_evidence + 1):
-            # Small numbers are hard, but give high reward
-            difficulty = (i/num_fake_evidence)
-            value = 1 - math.log(difficulty)
-            e = Evidence(index, False, difficulty, value)
-            self.max_confidence[1] += value
-            self.all_evidence.append(e)
-            index += 1
-        # print('max_confidence', self.max_confidence)
-        # print('evidence total:', len(self.all_evidence))
+        # Every topic has the same evidence, so it is only created once per evidence count and shared
+        self.evidence_catalog = get_evidence_catalog(
+            self.num_true_evidence, self.num_fake_evidence)
+        self.all_evidence = self.evidence_catalog.evidence
+        self.max_confidence = self.evidence_catalog.max_confidence
+        self.evidence_validity = self.evidence_catalog.validity
 
     def retrieve_evidence(self, time_spent):
         # User retrieves evidence given time (higher reward = more effort/time spent)
@@ -160,8 +339,8 @@ class Topic:
 
         found_evidence = []
         # There are t rounds. In each round each evidence has the opporunity of being found by the user
-        global all_times
-        all_times.append(time_spent + 1)
+        if self.indexed_evidence_search:
+            return [self.all_evidence[i] for i in self.evidence_catalog.sample_found(int(time_spent + 1)).tolist()]
 
         for i in range(int(time_spent + 1)):
             for e in self.all_evidence:
@@ -191,10 +370,14 @@ class Topic:
 
     def add_argument(self, argument):
         self.arguments.append(argument)
+        side = 0 if argument.validity else 1
+        self.argument_counts[side] += 1
+        self.argument_evidence[side, [
+            e.identification for e in argument.evidence]] = True
         # print('added argument', argument)
 
     def vote(self, user, argument, ether_spent, reputation_spent, current_date):
-        if user.identification in self.voters:
+        if self.vote_store.has_voted(user.identification, self.identifier):
             print("ERROR: Already voted")
             exit(1)
 
@@ -210,35 +393,222 @@ class Topic:
             self.ether_for_truth += ether_spent
             self.rep_for_truth += reputation_spent
 
-        self.voters[user.identification] = [
-            user, argument, ether_spent, reputation_spent]
-        # print('items after vote', self.voters.items(), current_date)
-        if user.identification == 99:
-            global important_votes
-            important_votes.append(
-                (user.identification, current_date, argument.validity, ether_spent, reputation_spent))
+        self.vote_store.add(user.identification, self.identifier,
+                            argument.validity, ether_spent, reputation_spent)
         # if (current_date > 10):
             # exit(1)
         # if user.identification == 99 and current_date > 25:
             # exit(1)
 
+# Step 8: Define evidence creation
+evidence_catalogs = {}  # (num_true_evidence, num_fake_evidence) -> EvidenceCatalog
+
+
+class EvidenceCatalog:
+    # The evidence available for a topic. Every topic has the same evidence, so a catalog is created once per
+    # evidence count and shared. Besides the Evidence objects it keeps an index used by the indexed search:
+    #   - evidence sorted by difficulty_to_find (the chance of finding it in one round), cut into buckets whose
+    #     chances are within a factor of 2 of each other
+    #   - per validity, the evidence ordered from most to least convincing (rank = position in that order)
+    def __init__(self, num_true_evidence, num_fake_evidence):
+        self.key = (num_true_evidence, num_fake_evidence)
+        # Meaningful fact-checks include information that is corect but difficult to find.
+        # Fact-checks easy to verify are not included.
+        all_evidence = []
+        max_confidence = [0, 0]  # [True, False]
+        index = 0
+        for i in range(1, num_true_evidence + 1):
+            difficulty = math.pow(i/num_true_evidence, 2)
+            # difficulty = i/num_true_evidence
+            value = 1 - math.log(difficulty)  # + 0.01
+            e = Evidence(index, True, difficulty, value)
+            max_confidence[0] += value
+            all_evidence.append(e)
+            index += 1
+
+        for i in range(1, num_fake_evidence + 1):
+            # Small numbers are hard, but give high reward
+            difficulty = (i/num_fake_evidence)
+            value = 1 - math.log(difficulty)
+            e = Evidence(index, False, difficulty, value)
+            max_confidence[1] += value
+            all_evidence.append(e)
+            index += 1
+        # print('max_confidence', max_confidence)
+        # print('evidence total:', len(all_evidence))
+
+        self.evidence = tuple(all_evidence)
+        self.max_confidence = tuple(max_confidence)
+        self.validity = np.array(
+            [e.validity for e in all_evidence], dtype=bool)
+        self.confidence = np.array([e.confidence_value for e in all_evidence])
+        difficulty = np.array([e.difficulty_to_find for e in all_evidence])
+        for array in (self.validity, self.confidence):
+            array.flags.writeable = False
+
+        # Difficulty index (evidence that can never be found is left out)
+        order = np.argsort(-difficulty, kind='stable')
+        order = order[difficulty[order] > 0]
+        self.order = order
+        self.sorted_difficulty = np.minimum(difficulty[order], 1)
+        bucket = np.floor(-np.log2(self.sorted_difficulty)).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+        self.buckets = list(zip(starts.tolist(), np.append(
+            starts[1:], len(order)).tolist()))
+
+        # Per-validity order of how convincing the evidence is. side_rank[0] (truth) and side_rank[1] (lie) hold the
+        # rank for the evidence of that side and len(evidence) for the evidence of the other side.
+        self.rank = np.empty(len(all_evidence), dtype=np.int64)
+        self.side_rank = np.full(
+            (2, len(all_evidence)), len(all_evidence), dtype=np.int64)
+        for side_index, side in enumerate((True, False)):
+            side_evidence = np.flatnonzero(self.validity == side)
+            side_order = side_evidence[np.argsort(
+                -self.confidence[side_evidence], kind='stable')]
+            self.rank[side_order] = np.arange(len(side_order))
+            self.side_rank[side_index, side_order] = np.arange(len(side_order))
+
+        # log(1 - difficulty) per evidence for draw_first_rounds. Evidence that can never be found gets -0.0, which
+        # turns the draw into +inf (never found).
+        with np.errstate(divide='ignore'):
+            self.log_miss = np.where(
+                difficulty > 0, np.log1p(-np.minimum(difficulty, 1)), -0.0)
+
+    def sample_found(self, rounds, rng=np.random):
+        # Same model as Topic.retrieve_evidence: in each of `rounds` rounds every piece of evidence is found with
+        # chance difficulty_to_find. Returns the indices of the evidence found, in the order it was found.
+        # Instead of a draw per round and item, the items of each bucket are visited with geometric skips using the
+        # bucket's highest chance of being found in `rounds` rounds, and each visited item is kept with its own chance
+        # relative to that. At least half of the visited items are kept, so the cost follows the number found.
+        found = []
+        found_round = []
+        for start, end in self.buckets:
+            p = self.sorted_difficulty[start:end]
+            q_max = 1 - (1 - p[0]) ** rounds
+            if q_max >= 1:
+                candidates = np.arange(end - start)
+            else:
+                candidates = geometric_skips(q_max, end - start, rng)
+            if len(candidates) == 0:
+                continue
+
+            p = p[candidates]
+            q = 1 - (1 - p) ** rounds
+            kept = rng.random(len(candidates)) * q_max < q
+            p = p[kept]
+            q = q[kept]
+            found.append(self.order[start + candidates[kept]])
+
+            # Round in which each item was found first, given that it was found within `rounds` rounds
+            u = rng.random(len(p))
+            with np.errstate(divide='ignore'):
+                first_round = np.floor(np.log1p(-u * q) / np.log1p(-p))
+            found_round.append(np.where(
+                p >= 1, 0, np.minimum(first_round, rounds - 1)))
+
+        if len(found) == 0:
+            return np.empty(0, dtype=np.int64)
+        found = np.concatenate(found)
+        found_round = np.concatenate(found_round)
+        # In a round the evidence is found in catalog order
+        return found[np.lexsort((found, found_round))]
+
+    def sample_first_rounds(self, rounds, rng=np.random):
+        # Same model as sample_found, drawing the round in which each item is found first for the whole catalog
+        difficulty = np.minimum(self.sorted_difficulty, 1)
+        first_round = rng.geometric(difficulty) - 1
+        found = first_round < rounds
+        found_ids = self.order[found]
+        return found_ids[np.lexsort((found_ids, first_round[found]))]
+
+    def draw_first_rounds(self, rng, first_round):
+        # Same model as sample_first_rounds for the whole catalog in catalog order, drawn by inversion straight into
+        # the first_round buffer (length E, reused by the hot path). rng must be a numpy Generator.
+        # Evidence i is found within `rounds` rounds when first_round[i] < rounds.
+        rng.random(out=first_round)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.log(first_round, out=first_round)
+            np.divide(first_round, self.log_miss, out=first_round)
+        return np.floor(first_round, out=first_round)
+
+    def best_found(self, found, first_round, ranks):
+        # Id of the most convincing evidence in the found mask (earliest found on ties, like most_convincing),
+        # -1 if nothing was found. ranks is an integer buffer of length E.
+        best = -1
+        for side_rank in self.side_rank:
+            ranks.fill(len(ranks))
+            np.copyto(ranks, side_rank, where=found)
+            e = int(np.argmin(ranks))
+            if ranks[e] == len(ranks):
+                continue
+            if best < 0 or self.confidence[e] > self.confidence[best] or \
+                    (self.confidence[e] == self.confidence[best] and (first_round[e], e) < (first_round[best], best)):
+                best = e
+        return best
+
+    def most_convincing(self, found):
+        # The most convincing evidence of a found list (earliest found on ties), using the per-validity order
+        if len(found) == 0:
+            return None
+        ids = np.array([e.identification for e in found])
+        best = None
+        for side in (True, False):
+            side_positions = np.flatnonzero(self.validity[ids] == side)
+            if len(side_positions) == 0:
+                continue
+            position = side_positions[np.argmin(
+                self.rank[ids[side_positions]])]
+            if best is None or self.confidence[ids[position]] > self.confidence[ids[best]] or \
+                    (self.confidence[ids[position]] == self.confidence[ids[best]] and position < best):
+                best = position
+        return found[best]
+
+
+def get_evidence_catalog(num_true_evidence, num_fake_evidence):
+    key = (num_true_evidence, num_fake_evidence)
+    if key not in evidence_catalogs:
+        evidence_catalogs[key] = EvidenceCatalog(*key)
+    return evidence_catalogs[key]
+
+
+# Evidence search of the concurrent day mode. Only needs plain values so it can run in a thread or process pool.
+# Returns the ids of the evidence found, in the order found.
+def search_evidence_task(task):
+    num_true_evidence, num_fake_evidence, indexed, rounds, seed = task
+    catalog = get_evidence_catalog(num_true_evidence, num_fake_evidence)
+    rng = np.random.default_rng(seed)
+    if indexed:
+        return catalog.sample_found(rounds, rng)
+    return catalog.sample_first_rounds(rounds, rng)
+
+
+def geometric_skips(q, n, rng=np.random):
+    # Positions in range(n) that each succeed with chance q, found by jumping from success to success
+    positions = []
+    last = -1
+    while True:
+        gaps = rng.geometric(q, size=int(1.2 * (n - last) * q) + 8)
+        candidates = last + np.cumsum(gaps)
+        positions.append(candidates[candidates < n])
+        if candidates[-1] >= n:
+            return np.concatenate(positions)
+        last = candidates[-1]
+
 # Step 2: Define argument structure
 
 
 class Argument:
-    validity = False
-    evidence = []
-    total_confidence = 0
-    creator = None
-    topic = None
-    vote_count = 0
-
-    def __init__(self, creator, evidence, topic):
-        self.creator = creator
-        self.evidence = evidence
-        self.topic = topic  # reverse reference
+    # The creator and topic are referenced by id so that arguments do not keep fact-checkers or topics alive
+    __slots__ = ('creator_id', 'topic_id', 'evidence',
+                 'total_confidence', 'validity', 'vote_count')
+
+    def __init__(self, creator_id, evidence, topic_id):
+        self.creator_id = creator_id
+        self.evidence = tuple(evidence)
+        self.topic_id = topic_id
         self.total_confidence = sum([e.confidence_value for e in evidence])
         self.validity = self.evidence[0].validity
+        self.vote_count = 0
 
     def vote(self):
         self.vote_count += 1
@@ -248,10 +618,8 @@ class Argument:
 
 class Evidence:
     # E.g. [(T, 0.5, 1), (F, 1.5, 2), (T, 3.5, 4), (F, 7.0, 8.0) ….] where each element is piece of evidence and is represented by a tuple of (statement is true/false (validity V), difficult to find, confidence)
-    identification = 0
-    validity = False
-    difficulty_to_find = 0
-    confidence_value = 0
+    __slots__ = ('identification', 'validity',
+                 'difficulty_to_find', 'confidence_value')
 
     def __init__(self, identification, validity, difficulty_to_find, confidence_value):
         self.identification = identification
@@ -273,9 +641,36 @@ class Requester:
         self.daily_posts = daily_posts
 
     # Step 5: Define topic creation
-    def post_topic(self):
+    def post_topic(self, current_date, topic_duration, max_topic_ether_value, first_identifier, vote_store):
+        # daily_posts may be fractional (e.g. 2.5 posts a day). The fractional part is the chance of one extra post today.
+        import random
+        num_posts = int(self.daily_posts)
+        if random.random() < self.daily_posts - num_posts:
+            num_posts += 1
+
+        new_topics = []
+        for i in range(num_posts):
+            t = Topic(random.random() * max_topic_ether_value, current_date,
+                      current_date + topic_duration, first_identifier + i, vote_store)
+            new_topics.append(t)
         # print("I posted daily_posts posts")
-        pass
+        return new_topics
+
+
+# Step 4.5: Define the order in which fact-checkers act during a day
+class ActionScheduler:
+    # Every fact-checker gets daily_fact_checks actions a day. The actions of all fact-checkers are interleaved in a random order so
+    # that nobody always gets first pick of the topics. The order is built with numpy so it stays cheap for hundreds of thousands of actions.
+
+    def __init__(self, fact_checkers):
+        self.actions_per_agent = np.array(
+            [fc.daily_fact_checks for fc in fact_checkers], dtype=np.int64)
+
+    def daily_order(self):
+        # One entry per action holding the index of the acting fact-checker, e.g. [2, 0, 1, 2, 0, ...]
+        actions = np.repeat(np.arange(len(self.actions_per_agent)),
+                            self.actions_per_agent)
+        return np.random.permutation(actions)
 
 # Step 4: Define fact-checker/worker structure
 
@@ -287,21 +682,27 @@ class FactChecker:
     profile = [1.0, 0]
     num_visible_topics = 10
     rounds_of_effort_per_ether = 25  # 8 dollars per round (minimum wage)
+    # Approximate transaction price in ether to create an argument or vote (https://bitinfocharts.com/ethereum/) ... about 15 cents
+    transaction_cost = 0.0089
     identification = 0
     history = []
 
-    def __init__(self, identification, daily_fact_checks, profile):
+    def __init__(self, identification, daily_fact_checks, profile, vote_store, strategy=None):
         self.identification = identification
         self.daily_fact_checks = daily_fact_checks
         self.profile = profile
+        self.strategy = MixedStrategy() if strategy is None else strategy
         self.rep = 100
         self.history = []
-        self.voted_topics = []
+        self.vote_store = vote_store
+        vote_store.register_agent(self)
 
-    def fact_check(self, all_topics, max_topic_ether_value, current_date):
+    def fact_check(self, all_topics, max_topic_ether_value, current_date, workspace=None):
         # You cannot participate unless you have enough ether
         if self.ether == 0:
             return
+        if workspace is not None:
+            return self.fact_check_in_workspace(workspace, current_date)
 
         # print("I fact check daily_posts posts")
 
@@ -323,17 +724,61 @@ class FactChecker:
         self.pick_strategy(all_evidence, best_evidence,
                            chosen_topic, current_date)
 
+    def fact_check_in_workspace(self, workspace, current_date):
+        # Hot path of fact_check (Simulator.hot_path): the same steps, computed in the reused arrays of the workspace.
+        # The visible topics are drawn from workspace.topics (loaded once a day) and evidence is found with
+        # EvidenceCatalog.draw_first_rounds (sample_found with indexed_evidence_search).
+        visible, utilities = workspace.visible_utilities(
+            self, self.num_visible_topics)
+        if utilities.min() < 0:
+            print("ERROR: Negative Utility")
+            exit(1)
+        batch = StrategyBatch([self], workspace.rng)
+        batch.utilities = utilities.reshape(1, -1)
+        choice = self.strategy.choose_topics(batch)[0]
+        if choice < 0:
+            return
+        index = int(visible[choice])
+        topic = workspace.topics[index]
+
+        # Retrieve evidence for the topic
+        rounds = int(utilities[choice] * self.rounds_of_effort_per_ether + 1)
+        catalog = topic.evidence_catalog
+        num_evidence = len(catalog.evidence)
+        found = workspace.get('found', (1, num_evidence), bool)
+        first_round = workspace.get('first_round', (num_evidence,))
+        if topic.indexed_evidence_search:
+            # Large catalogs: the cost follows the evidence found, the found order stands in for the rounds
+            ids = catalog.sample_found(rounds, workspace.rng)
+            found.fill(False)
+            found[0, ids] = True
+            first_round[ids] = np.arange(len(ids))
+        else:
+            catalog.draw_first_rounds(workspace.rng, first_round)
+            np.less(first_round, rounds, out=found[0])
+        if not found.any():
+            return
+        best = catalog.best_found(found[0], first_round, workspace.get(
+            'ranks', (num_evidence,), np.int64))
+        best_validity = workspace.get('best_validity', (1,), bool)
+        best_validity[0] = catalog.validity[best]
+
+        play_strategies(self.strategy, [self], [topic], found, best_validity,
+                        current_date, rng=workspace.rng, workspace=workspace)
+        workspace.update_topic(index)
+        workspace.voted[self.identification, index] = self.vote_store.has_voted(
+            self.identification, topic.identifier)
+
     def pick_best_topic(self, all_topics):
         # Step 6: Define topic assignment (random)
         visible_topics = np.random.choice(
             all_topics, size=self.num_visible_topics, replace=True)
 
-        # Step 6.5: Choose topic that maximizes reward for participation
-        best_value = 0
-        chosen_topic = None
-        for topic in visible_topics:
+        # Step 6.5: Choose topic (by default the one that maximizes reward for participation)
+        utilities = np.zeros(len(visible_topics))
+        for i, topic in enumerate(visible_topics):
             # The fact-checker has already fact-checked this topic
-            if self.identification in topic.voters:
+            if self.vote_store.has_voted(self.identification, topic.identifier):
                 # print('already fact-checked')
                 continue
 
@@ -342,17 +787,23 @@ class FactChecker:
             if utility < 0:
                 print("ERROR: Negative Utility")
                 exit(1)
-            if utility > best_value:
-                best_value = utility
-                chosen_topic = topic
+            utilities[i] = utility
+
+        batch = StrategyBatch([self])
+        batch.utilities = utilities[None, :]
+        choice = self.strategy.choose_topics(batch)[0]
+        if choice < 0:
+            return None, 0
 
         # print('chosen topic', best_value, chosen_topic)
-        return chosen_topic, best_value
+        return visible_topics[choice], utilities[choice]
 
     def search_for_evidence(self, topic, time_spent):
         # (Search for evidence in topic)
         evidence = topic.retrieve_evidence(time_spent=time_spent)
         # Choose side (based on most confidence-inducing evidence) and filter evidence
+        if topic.indexed_evidence_search:
+            return (topic.evidence_catalog.most_convincing(evidence), evidence)
         e_conf = 0
         best_e = None
         for e in evidence:
@@ -368,178 +819,381 @@ class FactChecker:
         # If the player i plays honestly; it follows the protocol and attempts to maximize its own ether reward by creating convincing arguments.
         # If the player i acts malicously; it knowingly uses false information to construct its argument
         # s_i = honest, malicous
-        import random
-        r = random.random()
-
-        if r <= self.profile[0]:
-            self.act_honestly(all_evidence, best_evidence,
-                              chosen_topic, current_date)
-        else:
-            self.act_maliciously(all_evidence, best_evidence,
-                                 chosen_topic, current_date)
-
-    def act_honestly(self, all_evidence, best_evidence, chosen_topic, current_date):
-        matching_evidence = [
-            e for e in all_evidence if e.validity == best_evidence.validity]
-
-        # Compare against existing evidence in other arguments
-        added_evidence = True if len(chosen_topic.arguments) == 0 else False
-        temp_id_list = [e.identification for e in matching_evidence]
-
-        if not added_evidence:
-            for arg in chosen_topic.arguments:
-                if arg.validity == best_evidence.validity:
-
-                    # Include evidence from other arguments to improve 'convincing' value of argument a (q_a)
-                    for arg_evidence in arg.evidence:
-                        if arg_evidence.identification not in temp_id_list:
-                            added_evidence = True
-                            matching_evidence.append(arg_evidence)
-                            temp_id_list.append(arg_evidence.identification)
-
-        # Make an argument if there is new information.
-        if (added_evidence) and self.ether >= 0.00089:
-            best_argument = Argument(self, matching_evidence, chosen_topic)
-            best_argument_confidence = best_argument.total_confidence
-            chosen_topic.add_argument(best_argument)
-
-            # Deduct ether in wallet for argument creation transaction
-            # Approximate transaction price in ether to create an argument (https://bitinfocharts.com/ethereum/) ... about 15 cents
-            self.spend_ether(0.0089)
-
-        # Vote for most convincing argument
-        best_argument_confidence = 0
-        best_argument = None
-        for arg in chosen_topic.arguments:
-            # 3 pieces of information affect the user's decision
-            reputation_influence = chosen_topic.rep_for_lie / \
-                100 if arg.validity == False else chosen_topic.rep_for_truth/100
-            convincing_value = arg.total_confidence + \
-                reputation_influence + math.sqrt(arg.creator.rep)
-            if convincing_value > best_argument_confidence:
-                best_argument = arg
-                best_argument_confidence = convincing_value
-
-        if best_argument is None:
-            return
-
-        # Step 10: Define voting
-        # Deduct ether in wallet for vote transaction
-        # Approximate transaction price in ether to create an argument (https://bitinfocharts.com/ethereum/) ... about 15 cents
-        self.spend_ether(0.0089)
-        e, r = self.calculate_ether_and_rep_to_spend(
-            chosen_topic, best_argument)
-        if (e > 0.05):
-            chosen_topic.vote(self, best_argument, e, r, current_date)
-            self.ether -= e  # Ether spent to add to reward pool
-            # Reputation spent to influence other players (fact-checkers)
-            self.rep -= r
-            self.voted_topics.append(chosen_topic)
-
-    def act_maliciously(self, all_evidence, best_evidence, chosen_topic, current_date):
-        matching_evidence = [e for e in all_evidence if e.validity == False]
-        # Compare against existing evidence in other arguments
-        added_evidence = True if len(
-            [a for a in chosen_topic.arguments if a.validity == False]) == 0 else False
-        temp_id_list = [e.identification for e in matching_evidence]
-
-        if len(matching_evidence) > 0:
-            if not added_evidence:
-                for arg in chosen_topic.arguments:
-                    if arg.validity == False:
-
-                        # Include evidence from other arguments to improve 'convincing' value of argument a (q_a)
-                        for arg_evidence in arg.evidence:
-                            if arg_evidence.identification not in temp_id_list:
-                                added_evidence = True
-                                matching_evidence.append(arg_evidence)
-                                temp_id_list.append(
-                                    arg_evidence.identification)
-
-            # Make an argument if there is new information.
-            if (added_evidence) and self.ether >= 0.00089:
-                best_argument = Argument(self, matching_evidence, chosen_topic)
-                best_argument_confidence = best_argument.total_confidence
-                chosen_topic.add_argument(best_argument)
-
-                # Deduct ether in wallet for argument creation transaction
-                # Approximate transaction price in ether to create an argument (https://bitinfocharts.com/ethereum/) ... about 15 cents
-                self.spend_ether(0.0089)
-
-        # Vote for most convincing argument
-        # if len(chosen_topic.arguments) == 0:
-        #     return
-
-        best_argument_confidence = 0
-        best_argument = None
-        for arg in chosen_topic.arguments:
-            # Skip all arguments that actually reveal the truth about the topic
-            if arg.validity == True:
-                continue
-            # 3 pieces of information affect the user's decision
-            reputation_influence = chosen_topic.rep_for_lie / \
-                100 if arg.validity == False else chosen_topic.rep_for_truth/100
-            convincing_value = arg.total_confidence + \
-                reputation_influence + math.sqrt(arg.creator.rep)
-            if convincing_value > best_argument_confidence:
-                best_argument = arg
-                best_argument_confidence = convincing_value
-
-        if best_argument is None:
-            return
-
-        # Step 10: Define voting
-        # Deduct ether in wallet for vote transaction
-        # Approximate transaction price in ether to create an argument (https://bitinfocharts.com/ethereum/) ... about 15 cents
-        self.spend_ether(0.0089)
-        e, r = self.calculate_ether_and_rep_to_spend(
-            chosen_topic, best_argument)
-        if (e > 0.05):
-            chosen_topic.vote(self, best_argument, 0.05, r, current_date)
-            self.ether -= 0.05  # Ether spent to add to reward pool
-            # Reputation spent to influence other players (fact-checkers)
-            self.rep -= r
-            self.voted_topics.append(chosen_topic)
+        # The decision is made by the fact-checker's Strategy as a batch of one fact-checker (see play_strategies)
+        found = np.zeros((1, len(chosen_topic.all_evidence)), dtype=bool)
+        found[0, [e.identification for e in all_evidence]] = True
+        play_strategies(self.strategy, [self], [chosen_topic], found,
+                        np.array([best_evidence.validity]), current_date)
 
     def spend_ether(self, eth):
         self.ether -= eth
         self.ether = max(self.ether, 0)
 
-    # Simple mechanism where the more confident a user is in an argument, the more ether and reputation they are willing to spend when voting
-    def calculate_ether_and_rep_to_spend(self, topic, argument):
-        confidence_ratio = 0
-        if argument.validity == False:
-            confidence_ratio = argument.total_confidence / \
-                topic.max_confidence[1]
-        else:
-            confidence_ratio = argument.total_confidence / \
-                topic.max_confidence[0]
+    # Store data
+    def save(self, current_day):
+        # Ether and reputation still locked in topics that have not been settled count towards the fact-checker's total
+        additional_ether, additonal_rep = self.vote_store.open_position(
+            self.identification)
 
-        # print('reputation', argument.validity, argument.total_confidence, self.rep, confidence_ratio, confidence_ratio * self.rep)
+        self.history.append(
+            [self.identification, current_day, self.ether + additional_ether, min(self.rep + additonal_rep, 1000), self.profile])
 
-        # Rounding errors cause it to go over 1. Players are conservative and only want to put at most half of current at risk
-        confidence_ratio = min(confidence_ratio, 1) / 2
 
-        return (min(confidence_ratio * self.ether, 1), confidence_ratio * self.rep)
+# Step 9: Define strategies
+# A strategy decides for a batch of fact-checkers at once from the arrays of a StrategyBatch.
+# Row b of every array describes batch.agents[b]. Sides are indexed like Topic.max_confidence: 0 = truth, 1 = lie.
+# New strategies subclass Strategy, implement plan_arguments and choose_votes and are added to `strategies`.
+class StrategyBatch:
+    # Filled in by the engine as the decisions progress:
+    #   utilities (B, visible topics)         reward for participating in each visible topic
+    #   found (B, E)                          evidence found by the search, E = evidence of a topic
+    #   evidence_validity (B, E)              validity of each piece of evidence
+    #   best_validity (B,)                    validity of the most convincing evidence found
+    #   found_side (B, 2)                     found evidence supporting each side
+    #   has_arguments (B,)                    the topic already has arguments
+    #   has_side_arguments (B, 2)             the topic already has arguments for each side
+    #   adds_evidence (B, 2)                  existing arguments of each side have evidence the agent did not find
+    #   argument_scores (B, A)                convincing value of each argument of the topic (-inf = no argument)
+    #   argument_validity (B, A)              side of each argument
+    #   ether_at_risk, rep_at_risk (B,)       what the agent is willing to put at risk for its chosen argument
+    def __init__(self, agents, rng=np.random):
+        self.agents = agents
+        self.rng = rng  # random numbers for the strategy (np.random or a numpy Generator)
+        self.honest_prob = np.array([a.profile[0] for a in agents])
+
+
+def most_convincing(scores):
+    # Index of the highest scoring argument per row, -1 if the row has no argument to vote for
+    best = np.argmax(scores, axis=1)
+    best_scores = scores[np.arange(len(best)), best]
+    return np.where(np.isfinite(best_scores) & (best_scores > 0), best, -1)
+
+
+class Strategy:
+    def choose_topics(self, batch):
+        # Topic that maximizes reward for participation (-1 = no topic worth participating in)
+        best = np.argmax(batch.utilities, axis=1)
+        return np.where(batch.utilities[np.arange(len(best)), best] > 0, best, -1)
+
+    def plan_arguments(self, batch):
+        # Returns (side to argue for as bool (True = truth), whether to create an argument)
+        raise NotImplementedError
+
+    def choose_votes(self, batch):
+        # Returns the index of the argument to vote for (-1 = do not vote)
+        raise NotImplementedError
+
+    def stakes(self, batch):
+        # Returns the ether to put into the reward pool (0 = do not vote)
+        return np.where(batch.ether_at_risk > 0.05, batch.ether_at_risk, 0)
+
+
+class HonestStrategy(Strategy):
+    # Follows the protocol and attempts to maximize its own ether reward by creating convincing arguments
+    def plan_arguments(self, batch):
+        side = batch.best_validity
+        side_index = np.where(side, 0, 1)
+        # Make an argument if there is new information
+        create = ~batch.has_arguments | batch.adds_evidence[np.arange(
+            len(side)), side_index]
+        return side, create
+
+    def choose_votes(self, batch):
+        return most_convincing(batch.argument_scores)
+
+
+class MaliciousStrategy(Strategy):
+    # Knowingly uses false information to construct its argument and only votes for false arguments
+    def plan_arguments(self, batch):
+        side = np.zeros(len(batch.agents), dtype=bool)
+        create = batch.found_side[:, 1] & (
+            ~batch.has_side_arguments[:, 1] | batch.adds_evidence[:, 1])
+        return side, create
+
+    def choose_votes(self, batch):
+        # Skip all arguments that actually reveal the truth about the topic
+        return most_convincing(np.where(batch.argument_validity, -np.inf, batch.argument_scores))
+
+    def stakes(self, batch):
+        # Only puts the minimum into the reward pool
+        return np.where(batch.ether_at_risk > 0.05, 0.05, 0)
+
+
+class MixedStrategy(Strategy):
+    # Acts honestly with probability profile[0] and maliciously otherwise. The coin is flipped again on every fact-check.
+    def __init__(self):
+        self.honest = HonestStrategy()
+        self.malicious = MaliciousStrategy()
+
+    def plan_arguments(self, batch):
+        batch.acts_honestly = batch.rng.random(
+            len(batch.agents)) <= batch.honest_prob
+        honest_side, honest_create = self.honest.plan_arguments(batch)
+        malicious_side, malicious_create = self.malicious.plan_arguments(batch)
+        return (np.where(batch.acts_honestly, honest_side, malicious_side),
+                np.where(batch.acts_honestly, honest_create, malicious_create))
+
+    def choose_votes(self, batch):
+        return np.where(batch.acts_honestly, self.honest.choose_votes(batch), self.malicious.choose_votes(batch))
+
+    def stakes(self, batch):
+        return np.where(batch.acts_honestly, self.honest.stakes(batch), self.malicious.stakes(batch))
+
+
+strategies = {'honest': HonestStrategy,
+              'malicious': MaliciousStrategy, 'mixed': MixedStrategy}
+
+
+# Scratch arrays reused from one fact-check to the next, one workspace per worker (see Simulator.hot_path).
+# get() hands out a view of a named buffer that only grows when a call needs more room, so the inner loop writes
+# into the same memory on every fact-check instead of allocating new arrays.
+class Workspace:
+    def __init__(self, rng=None):
+        self.rng = rng  # numpy Generator of the hot path (draws straight into the buffers)
+        self.buffers = {}
+        self.views = {}  # name -> (shape, view) of the last get(), handed out again for the same shape
+        self.topics = []
+
+    def get(self, name, shape, dtype=np.float64):
+        view = self.views.get(name)
+        if view is not None and view[0] == shape:
+            return view[1]
+        size = math.prod(shape)
+        buffer = self.buffers.get(name)
+        if buffer is None or len(buffer) < size:
+            buffer = np.empty(
+                max(size, 2 * (0 if buffer is None else len(buffer))), dtype=dtype)
+            self.buffers[name] = buffer
+        view = buffer[:size].reshape(shape)
+        self.views[name] = (shape, view)
+        return view
+
+    def load_topics(self, topics, vote_store):
+        # Today's active topics as columns (reward pool, ether and reputation per side) and a
+        # (fact-checker, topic) mask of open votes. Topics are in order of identifier.
+        self.topics = topics
+        self.topic_state = self.get('topic_state', (5, len(topics)))
+        for index in range(len(topics)):
+            self.update_topic(index)
+        self.voted = self.get(
+            'voted', (len(vote_store.agents), len(topics)), bool)
+        self.voted.fill(False)
+        if len(topics) == 0:
+            return
+        rows = vote_store.open_vote_rows()
+        identifiers = np.array([t.identifier for t in topics])
+        vote_topics = vote_store.topic[rows]
+        index = np.minimum(np.searchsorted(identifiers, vote_topics), len(topics) - 1)
+        active = identifiers[index] == vote_topics
+        self.voted[vote_store.agent[rows][active], index[active]] = True
+
+    def update_topic(self, index):
+        topic = self.topics[index]
+        state = self.topic_state
+        state[0, index] = topic.reward_pool
+        state[1, index] = topic.ether_for_lie
+        state[2, index] = topic.ether_for_truth
+        state[3, index] = topic.rep_for_lie
+        state[4, index] = topic.rep_for_truth
+
+    def visible_utilities(self, agent, num_visible_topics):
+        # Draws num_visible_topics of the loaded topics (with replacement) and computes
+        # Topic.get_utility_for_participation for agent on all of them at once (0 where agent already voted).
+        # Returns (topic indices, utilities), both views of reused buffers.
+        draws = self.get('draws', (num_visible_topics,))
+        visible = self.get('visible', (num_visible_topics,), np.int64)
+        self.rng.random(out=draws)
+        np.multiply(draws, len(self.topics), out=draws)
+        np.copyto(visible, draws, casting='unsafe')
+
+        pool, ether_for_lie, ether_for_truth, rep_for_lie, rep_for_truth = self.topic_state
+        utilities = self.get('utilities', (num_visible_topics,))
+        side_ether = self.get('side_ether', (num_visible_topics,))
+        mask = self.get('visible_mask', (num_visible_topics,), bool)
+        # Rational Strategy: Join the side of the majority to win! (votes not visible)
+        np.take(rep_for_lie, visible, out=utilities)
+        np.take(rep_for_truth, visible, out=side_ether)
+        np.greater(utilities, side_ether, out=mask)
+        np.take(ether_for_truth, visible, out=side_ether)
+        np.take(ether_for_lie, visible, out=utilities)
+        np.copyto(side_ether, utilities, where=mask)
+        # (user_ether) / (user_ether + side ether) * new_ether_pool
+        ether = agent.ether
+        np.add(side_ether, ether, out=side_ether)
+        np.divide(ether, side_ether, out=side_ether)
+        np.take(pool, visible, out=utilities)
+        np.add(utilities, ether, out=utilities)
+        np.multiply(utilities, side_ether, out=utilities)
+        # The fact-checker has already fact-checked this topic
+        np.take(self.voted[agent.identification], visible, out=mask)
+        np.copyto(utilities, 0, where=mask)
+        return visible, utilities
+
+
+# A topic as it was at the start of a round of the concurrent day mode. Every strategy batch plans its arguments
+# against its own copy, so batches on the same topic do not see each other's new arguments and the order in which
+# they play does not matter. New arguments and votes are passed on to the topic itself (see Simulator.play_topic).
+class TopicSnapshot:
+    def __init__(self, topic):
+        self.topic = topic
+        self.identifier = topic.identifier
+        self.vote_store = topic.vote_store
+        self.all_evidence = topic.all_evidence
+        self.evidence_validity = topic.evidence_validity
+        self.max_confidence = topic.max_confidence
+        self.arguments = list(topic.arguments)
+        self.argument_counts = list(topic.argument_counts)
+        self.argument_evidence = topic.argument_evidence.copy()
+        self.rep_for_lie = topic.rep_for_lie
+        self.rep_for_truth = topic.rep_for_truth
+
+    def copy(self):
+        import copy
+        snapshot = copy.copy(self)
+        snapshot.arguments = list(self.arguments)
+        snapshot.argument_counts = list(self.argument_counts)
+        snapshot.argument_evidence = self.argument_evidence.copy()
+        return snapshot
 
-    # Store data
-    def save(self, current_day):
-        additional_ether = 0
-        additonal_rep = 0
-        new_topics = []
+    def add_argument(self, argument):
+        self.topic.add_argument(argument)
+        self.arguments.append(argument)
+        side = 0 if argument.validity else 1
+        self.argument_counts[side] += 1
+        self.argument_evidence[side, [
+            e.identification for e in argument.evidence]] = True
 
-        for t in self.voted_topics:
-            if t.is_expired(current_day - 1):
-                continue
-            new_topics.append(t)
-            # [user, argument, ether, rep]
-            additional_ether += t.voters[self.identification][2]
-            # [user, argument, ether, rep]
-            additonal_rep += t.voters[self.identification][3]
+    def vote(self, user, argument, ether_spent, reputation_spent, current_date):
+        self.topic.vote(user, argument, ether_spent,
+                        reputation_spent, current_date)
+
+
+# Create arguments and vote for a batch of fact-checkers that all use the same strategy.
+# topics[b] is the topic agents[b] chose and found[b] (B, E) marks the evidence it found for it.
+# creator_rep (indexed by fact-checker id) fixes the reputation of argument creators, e.g. to the start of a round.
+# The arrays that grow with the evidence and the arguments of a topic are taken from workspace when one is given.
+def play_strategies(strategy, agents, topics, found, best_validity, current_date, creator_rep=None, rng=np.random, workspace=None):
+    batch = create_arguments(
+        strategy, agents, topics, found, best_validity, rng, workspace)
+    cast_votes(strategy, batch, topics, current_date, creator_rep, workspace)
+
+
+# First half of play_strategies: plan and create the arguments. Returns the StrategyBatch for cast_votes.
+def create_arguments(strategy, agents, topics, found, best_validity, rng=np.random, workspace=None):
+    ws = Workspace() if workspace is None else workspace
+    num_agents, num_evidence = found.shape
+    batch = StrategyBatch(agents, rng)
+    batch.best_validity = best_validity
+    batch.found = found
+    batch.evidence_validity = ws.get(
+        'evidence_validity', (num_agents, num_evidence), bool)
+    argument_evidence = ws.get(
+        'argument_evidence', (num_agents, 2, num_evidence), bool)
+    batch.has_side_arguments = ws.get(
+        'has_side_arguments', (num_agents, 2), bool)
+    for b, topic in enumerate(topics):
+        batch.evidence_validity[b] = topic.evidence_validity
+        argument_evidence[b] = topic.argument_evidence
+        batch.has_side_arguments[b] = topic.argument_counts
+    batch.has_arguments = batch.has_side_arguments.any(
+        axis=1, out=ws.get('has_arguments', (num_agents,), bool))
+
+    # (B, 2, E) masks per side: evidence found and evidence already used in existing arguments
+    found_side = ws.get('found_side', (num_agents, 2, num_evidence), bool)
+    np.logical_and(found, batch.evidence_validity, out=found_side[:, 0])
+    np.greater(found, batch.evidence_validity, out=found_side[:, 1])
+    batch.found_side = found_side.any(
+        axis=2, out=ws.get('found_any_side', (num_agents, 2), bool))
+    # Include evidence from other arguments to improve 'convincing' value of argument a (q_a)
+    unused_evidence = ws.get(
+        'unused_evidence', (num_agents, 2, num_evidence), bool)
+    np.greater(argument_evidence, found_side, out=unused_evidence)
+    batch.adds_evidence = unused_evidence.any(
+        axis=2, out=ws.get('adds_evidence', (num_agents, 2), bool))
+
+    side, create = strategy.plan_arguments(batch)
+    evidence = ws.get('evidence', (num_agents, num_evidence), bool)
+    ether = ws.get('ether', (num_agents,))
+    min_ether = ws.get('min_ether', (num_agents,))
+    for b, agent in enumerate(agents):
+        side_index = 0 if side[b] else 1
+        np.logical_or(found_side[b, side_index],
+                      argument_evidence[b, side_index], out=evidence[b])
+        ether[b] = agent.ether
+        # Arguments are made as long as a tenth of the transaction cost is left (0.00089 ether at the default cost)
+        min_ether[b] = agent.transaction_cost / 10
+    create = create & evidence.any(axis=1) & (ether >= min_ether)
+    for b in np.flatnonzero(create):
+        topic = topics[b]
+        topic.add_argument(Argument(agents[b].identification, [topic.all_evidence[i]
+                                                               for i in np.flatnonzero(evidence[b])], topic.identifier))
+        # Deduct ether in wallet for argument creation transaction
+        agents[b].spend_ether(agents[b].transaction_cost)
+    return batch
+
+
+# Second half of play_strategies: every agent of the batch votes for an argument of its topic
+def cast_votes(strategy, batch, topics, current_date, creator_rep=None, workspace=None):
+    ws = Workspace() if workspace is None else workspace
+    agents = batch.agents
+    num_agents = len(agents)
+    ether = ws.get('ether', (num_agents,))
+
+    # Vote for most convincing argument
+    num_arguments = max(len(t.arguments) for t in topics)
+    if num_arguments == 0:
+        return
+    batch.argument_scores = ws.get(
+        'argument_scores', (num_agents, num_arguments))
+    batch.argument_validity = ws.get(
+        'argument_validity', (num_agents, num_arguments), bool)
+    batch.argument_scores.fill(-np.inf)
+    batch.argument_validity.fill(False)
+    for b, topic in enumerate(topics):
+        for a, arg in enumerate(topic.arguments):
+            # 3 pieces of information affect the user's decision
+            reputation_influence = topic.rep_for_lie / \
+                100 if arg.validity == False else topic.rep_for_truth/100
+            rep = topic.vote_store.agents[arg.creator_id].rep if creator_rep is None else creator_rep[arg.creator_id]
+            batch.argument_scores[b, a] = arg.total_confidence + \
+                reputation_influence + math.sqrt(rep)
+            batch.argument_validity[b, a] = arg.validity
 
-        self.voted_topics = new_topics
-        self.history.append(
-            [self.identification, current_day, self.ether + additional_ether, min(self.rep + additonal_rep, 1000), self.profile])
+    choice = strategy.choose_votes(batch)
+    voting = choice >= 0
+
+    # Step 10: Define voting
+    # Deduct ether in wallet for vote transaction
+    for b in np.flatnonzero(voting):
+        agents[b].spend_ether(agents[b].transaction_cost)
+
+    # Simple mechanism where the more confident a user is in an argument, the more ether and reputation they are willing to spend when voting
+    chosen = []
+    confidence_ratio = ws.get('confidence_ratio', (num_agents,))
+    reputation = ws.get('reputation', (num_agents,))
+    for b, agent in enumerate(agents):
+        arg = topics[b].arguments[choice[b]] if voting[b] else None
+        chosen.append(arg)
+        confidence_ratio[b] = arg.total_confidence / topics[b].max_confidence[0 if arg.validity else 1] \
+            if arg is not None else 0
+        ether[b] = agent.ether
+        reputation[b] = agent.rep
+    # Rounding errors cause it to go over 1. Players are conservative and only want to put at most half of current at risk
+    np.minimum(confidence_ratio, 1, out=confidence_ratio)
+    confidence_ratio /= 2
+    batch.ether_at_risk = np.multiply(
+        confidence_ratio, ether, out=ws.get('ether_at_risk', (num_agents,)))
+    np.minimum(batch.ether_at_risk, 1, out=batch.ether_at_risk)
+    batch.rep_at_risk = np.multiply(
+        confidence_ratio, reputation, out=ws.get('rep_at_risk', (num_agents,)))
+
+    stakes = strategy.stakes(batch)
+    for b in np.flatnonzero(voting & (stakes > 0)).tolist():
+        agent, eth, rep = agents[b], float(stakes[b]), float(batch.rep_at_risk[b])
+        topics[b].vote(agent, chosen[b], eth, rep, current_date)
+        agent.ether -= eth  # Ether spent to add to reward pool
+        # Reputation spent to influence other players (fact-checkers)
+        agent.rep -= rep
 
 
 # Normal Form Game:
@@ -575,7 +1229,7 @@ class FactChecker:
 # For example in a game with 50 players, player 1 has a 100% chance of acting hoenstly, player 2 has a 98% chance, player 3 has a 96% chance, etc.
 
 # More staring assumptions:
-# Each fact-checker fact-checks once a day
+# Each fact-checker fact-checks daily_fact_checks times a day (once by default), interleaved with the other fact-checkers in a random order
 # There is 1 requester posting 10 topics a day (can be extended)
 # Each topic lasts 3 days
 # Each topic has a initial value of between 0 and 10 ether
@@ -626,18 +1280,155 @@ class FactChecker:
 # Want to maximize the quality of arguments or how convincing they are (measured by evidence and character count of argument)
 # Limited to posting between 0 and 10 ether
 
+# Steady-state detection:
+# Tracks the daily outcome rates of settled topics and the mean ether/reputation of each strategy class (profile).
+# Each day the mean of the last `window` days is compared with the mean of the `window` days before that.
+# Once the largest change stays below `tolerance` for `patience` days in a row the system is considered stationary.
+# Ether and reputation changes are relative to the size of the values so that one tolerance fits all metrics.
+class ConvergenceMonitor:
+    def __init__(self, window=20, tolerance=0.1, patience=None):
+        import collections
+        self.window = window
+        self.tolerance = tolerance
+        self.patience = window if patience is None else patience
+        # Only the last 2 windows are compared, older days are dropped
+        self.daily_metrics = collections.deque(maxlen=2 * window)
+        self.days_below_tolerance = 0
+        self.last_change = None
+
+    def update(self, settled_topics, fact_checkers):
+        outcome_counts = np.bincount(
+            [t.outcome() for t in settled_topics], minlength=4)
+        # No topics settled today, keep the previous rates
+        if outcome_counts.sum() > 0:
+            outcome_rates = outcome_counts / outcome_counts.sum()
+        elif len(self.daily_metrics) > 0:
+            outcome_rates = self.daily_metrics[-1][:4]
+        else:
+            outcome_rates = np.zeros(4)
+
+        # Latest history row of every fact-checker: [id, day, ether, rep, profile]
+        classes = {}
+        for fc in fact_checkers:
+            row = fc.history[-1]
+            classes.setdefault(tuple(fc.profile), []).append((row[2], row[3]))
+        class_means = [np.mean(classes[k], axis=0) for k in sorted(classes)]
+
+        self.daily_metrics.append(np.concatenate(
+            [outcome_rates] + class_means))
+        if len(self.daily_metrics) < 2 * self.window:
+            return False
+
+        metrics = np.array(self.daily_metrics)
+        previous = metrics[:self.window].mean(axis=0)
+        current = metrics[self.window:].mean(axis=0)
+        change = np.abs(current - previous)
+        # Rates are already between 0 and 1, ether/rep are compared relative to their size
+        change[4:] /= np.maximum(np.abs(previous[4:]), 1)
+        self.last_change = change.max()
+
+        if self.last_change < self.tolerance:
+            self.days_below_tolerance += 1
+        else:
+            self.days_below_tolerance = 0
+        return self.days_below_tolerance >= self.patience
+
+
+# Live progress:
+# Publishes one JSON object per simulated day from a background thread so that the simulation never waits for I/O.
+# Lines are appended to a JSON-lines file (follow with `tail -f`) and/or sent as UDP datagrams to (host, port).
+# Every line carries the run id so that many concurrent runs can share one file or listener.
+# If the thread falls behind by more than max_queued days, days are dropped (and counted) instead of blocking.
+# If the thread stops on an error (e.g. the file cannot be opened), the error is printed once and the run goes on.
+class MetricsPublisher:
+    def __init__(self, path=None, address=None, run_id=None, max_queued=10000):
+        import os
+        import queue
+        self.path = path
+        self.address = address
+        self.run_id = os.getpid() if run_id is None else run_id
+        self.queue = queue.Queue(max_queued)
+        self.dropped = 0
+        self.thread = None
+        self.error = None  # set when the writer thread stopped on an error
+
+    def start(self):
+        import threading
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def publish(self, metrics):
+        import queue
+        metrics['run'] = self.run_id
+        try:
+            self.queue.put_nowait(metrics)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        import queue
+        if self.thread is None:
+            return
+        # A writer that died does not empty the queue any more, so do not wait for room in it
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self.thread.join()
+        self.thread = None
+
+    def write_loop(self):
+        import json
+        import socket
+        f = None
+        sock = None
+        try:
+            f = open(self.path, 'a') if self.path is not None else None
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if self.address is not None else None
+            while True:
+                metrics = self.queue.get()
+                if metrics is None:
+                    return
+                metrics['dropped'] = self.dropped
+                line = json.dumps(metrics) + '\n'
+                if f is not None:
+                    # One write per line so lines of concurrent runs do not interleave
+                    f.write(line)
+                    f.flush()
+                if sock is not None:
+                    try:
+                        sock.sendto(line.encode(), tuple(self.address))
+                    except OSError:
+                        pass  # nobody is listening
+        except Exception as error:
+            # Reported once, the run goes on without metrics
+            self.error = error
+            print("ERROR: metrics are not written any more:", error)
+        finally:
+            if f is not None:
+                f.close()
+            if sock is not None:
+                sock.close()
+
+
 class Simulator():
     # Requesters
     num_requesters = 1
-    requesters = []
+    requester_daily_posts = None  # e.g. [6, 2.5, 0.5] to give each requester its own posting rate
+    requesters = []  # (lists are recreated per simulator in __init__)
 
     # Fact Checkers
     num_fact_checkers = 20
     num_fact_checks_daily = 1
     fact_checkers = []
+    # Strategy (name in `strategies`) used by each group of fact-checkers, e.g. {'partial': 'honest'}. Groups not listed use 'mixed'.
+    group_strategies = {}
 
     # Topics
-    all_topics = []  # both expired and active topics
+    all_topics = []  # both expired and active topics (only kept if keep_all_topics)
+    keep_all_topics = True  # False: keep only active topics and open votes so their memory stays bounded in very long runs (the fact-checker histories still grow by a row a day)
     topics = []  # only active topics
     topics_generated_per_day = 10  # 10 topics generated a day
     topic_duration = 5  # 5 days
@@ -647,97 +1438,266 @@ class Simulator():
     total_days = 200  # What would occur in a year?
     current_date = 0  # simulation starts at day 0
 
+    # Optional ConvergenceMonitor. When the system becomes stationary fact-checking stops early and the open topics are settled.
+    convergence_monitor = None
+    stopping_day = None  # day fact-checking stopped because of convergence (None if the run used all of total_days)
+
+    # Ether/reputation charts: 'lines' (one line per fact-checker), 'bands' (quantile bands per strategy class)
+    # or 'auto' (bands above trajectory_band_threshold fact-checkers)
+    trajectory_mode = 'auto'
+    trajectory_band_threshold = 200
+
+    # Optional MetricsPublisher that receives per-day aggregates while the simulation runs
+    metrics_publisher = None
+
+    # Concurrent day mode (simultaneous moves): the k-th fact-check of every fact-checker in a day forms round k.
+    # In a round all fact-checkers pick topics from the same state, their evidence searches run in a pool of
+    # search_workers threads or processes (search_pool), and then arguments and votes are made per topic against
+    # the state of the topic at the start of the round (TopicSnapshot). Every search and topic gets its own random
+    # seed, so results do not depend on the pool or on the order in which strategies play.
+    concurrent_days = False
+    search_workers = 4
+    search_pool = 'thread'  # 'thread' or 'process' (threads inside the processes of a multiprocessing pool)
+
+    # Hot path: fact-checks compute topic utilities, evidence discovery and argument scores in reused scratch arrays
+    # (a Workspace per worker) instead of new lists and arrays on every fact-check. Same model as the default path,
+    # but it draws its random numbers from its own generator, so seeded runs give different (equally distributed) results.
+    hot_path = False
+
     def __init__(self):
         super().__init__()
+        self.requesters = []
+        self.fact_checkers = []
+        self.all_topics = []
+        self.topics = []
+        self.statistics = OnlineStatistics()
+        self.strategy_instances = {}
+        self.vote_store = VoteStore(keep_settled=self.keep_all_topics)
         self.generate_requesters()
         self.generate_fact_checkers()
+        self.scheduler = ActionScheduler(self.fact_checkers)
         self.topic_index = 0
+        if self.hot_path:
+            self.workspace = Workspace(
+                np.random.default_rng(np.random.randint(2**31)))
 
     def run_simulation(self):
+        import concurrent.futures
+        import multiprocessing
+        if self.metrics_publisher is not None:
+            self.metrics_publisher.start()
+        if self.concurrent_days:
+            # Workers of a multiprocessing pool (e.g. the batch runner with -j) cannot start processes of their own,
+            # they search in threads instead. Results do not depend on the pool.
+            use_processes = self.search_pool == 'process' and not multiprocessing.current_process().daemon
+            pool_type = concurrent.futures.ProcessPoolExecutor if use_processes \
+                else concurrent.futures.ThreadPoolExecutor
+            self.search_executor = pool_type(self.search_workers)
+        try:
+            self.simulate_days()
+        finally:
+            if self.metrics_publisher is not None:
+                self.metrics_publisher.close()
+            if self.concurrent_days:
+                self.search_executor.shutdown()
+
+    def simulate_days(self):
+        import time
+
         # Record status of each person
         for fc in self.fact_checkers:
             fc.save(self.current_date)
 
+        last_day = self.total_days
         for i in range(self.total_days):
+            if i >= last_day:
+                break
             self.current_date = i
-
-            # Shuffle fact_checkers
-            np.random.shuffle(self.fact_checkers)
-
-            if (self.total_days - i > self.topic_duration):
+            day_start = time.perf_counter()
+            votes_before = self.vote_store.num_votes
+            arguments_created = 0
+            num_actions = 0
+
+            # Stop fact-checking when there are only topic_duration days remaining
+            active = last_day - i > self.topic_duration
+            if active:
                 # Generate topics
                 self.generate_new_topics()
 
-                # Create arguments and vote
-                for fc in self.fact_checkers:
-                    # Stop fact-checking when there are 3 days remaining only
-                    if (self.total_days - i <= self.topic_duration):
-                        break
-
-                    # 1) View arguments, 2) View evidence, and 3) Make new argument or fact-check
-                    fc.fact_check(
-                        self.topics, self.max_topic_ether_value, self.current_date)
+                # The active topics do not change during the day, so only build the array fact-checkers pick from once
+                active_topics = np.empty(len(self.topics), dtype=object)
+                active_topics[:] = self.topics
+
+                # Create arguments and vote (each fact-checker acts daily_fact_checks times in a random interleaved order)
+                if len(active_topics) > 0:
+                    arguments_before = sum(len(t.arguments) for t in self.topics)
+                    daily_order = self.scheduler.daily_order()
+                    num_actions = len(daily_order)
+                    if self.concurrent_days:
+                        self.concurrent_fact_checks(daily_order, active_topics)
+                    else:
+                        workspace = None
+                        if self.hot_path:
+                            workspace = self.workspace
+                            workspace.load_topics(self.topics, self.vote_store)
+                        for fc_index in daily_order:
+                            # 1) View arguments, 2) View evidence, and 3) Make new argument or fact-check
+                            self.fact_checkers[fc_index].fact_check(
+                                active_topics, self.max_topic_ether_value, self.current_date, workspace)
+                    arguments_created = sum(len(t.arguments)
+                                            for t in self.topics) - arguments_before
+            # Counted before settling, which may compact the vote store (keep_all_topics = False)
+            votes_cast = self.vote_store.num_votes - votes_before
 
             # Remove expired topics and claim rewards (reward is distributed to all voters)
-            self.remove_expired_topics()
+            settled_topics = self.remove_expired_topics()
 
             # Record status of each person
             for fc in self.fact_checkers:
                 fc.save(self.current_date + 1)
 
+            # Stationary system: stop fact-checking and only let the remaining topics settle
+            if active and self.convergence_monitor is not None and self.convergence_monitor.update(settled_topics, self.fact_checkers):
+                self.stopping_day = i
+                last_day = i + 1 + self.topic_duration
+
+            if self.metrics_publisher is not None:
+                seconds = max(time.perf_counter() - day_start, 1e-9)
+                self.metrics_publisher.publish({
+                    'day': i,
+                    'active_topics': len(self.topics),
+                    'votes_cast': votes_cast,
+                    'arguments_created': arguments_created,
+                    'ether_in_pools': sum(t.reward_pool for t in self.topics),
+                    'outcomes': dict(zip(['truth', 'lie', 'tie', 'no_votes'], self.statistics.outcome_counts.tolist())),
+                    'agent_days_per_second': len(self.fact_checkers) / seconds,
+                    'actions_per_second': num_actions / seconds,
+                })
+
             # Repeat for # of total_days
 
+    def concurrent_fact_checks(self, daily_order, active_topics):
+        # The k-th action of each fact-checker today belongs to round k
+        by_agent = np.argsort(daily_order, kind='stable')
+        counts = np.bincount(daily_order, minlength=len(self.fact_checkers))
+        occurrence = np.empty(len(daily_order), dtype=np.int64)
+        occurrence[by_agent] = np.arange(
+            len(daily_order)) - np.repeat(np.cumsum(counts) - counts, counts)
+        for k in range(counts.max()):
+            self.simultaneous_round(daily_order[occurrence == k], active_topics)
+
+    def simultaneous_round(self, fc_indices, active_topics):
+        # 1) Everybody picks a topic from the state at the start of the round
+        choices = []
+        for fc_index in fc_indices:
+            fc = self.fact_checkers[fc_index]
+            # You cannot participate unless you have enough ether
+            if fc.ether == 0:
+                continue
+            topic, best_value = fc.pick_best_topic(active_topics)
+            if topic is not None:
+                choices.append(
+                    (fc, topic, best_value * fc.rounds_of_effort_per_ether))
+        if len(choices) == 0:
+            return
+
+        # 2) Search for evidence in the pool
+        seeds = np.random.randint(
+            0, 2**62, size=len(choices) + len(self.topics), dtype=np.int64).tolist()
+        tasks = []
+        for (fc, topic, time_spent), seed in zip(choices, seeds):
+            tasks.append(topic.evidence_catalog.key +
+                         (topic.indexed_evidence_search, int(time_spent + 1), seed))
+        chunksize = max(1, len(tasks) // (4 * self.search_workers))
+        found_ids = self.search_executor.map(
+            search_evidence_task, tasks, chunksize=chunksize)
+
+        # 3) Create arguments and vote per topic, against the state of the topics at the start of the round
+        plays = {}
+        for (fc, topic, _), ids in zip(choices, found_ids):
+            if len(ids) == 0:
+                continue
+            evidence = [topic.all_evidence[i] for i in ids.tolist()]
+            plays.setdefault(topic.identifier, (topic, []))[1].append(
+                (fc, evidence, topic.evidence_catalog.most_convincing(evidence)))
+
+        creator_rep = np.array([a.rep for a in self.vote_store.agents])
+        topic_seeds = dict(zip([t.identifier for t in self.topics], seeds[len(choices):]))
+        snapshots = {identifier: TopicSnapshot(topic) for identifier, (topic, _) in plays.items()}
+        for identifier, (topic, topic_plays) in plays.items():
+            self.play_topic(snapshots[identifier], topic_plays, creator_rep,
+                            np.random.default_rng(topic_seeds[identifier]))
+
+    def play_topic(self, snapshot, plays, creator_rep, rng):
+        # Fact-checkers with the same strategy decide as one batch. All batches first create their arguments
+        # against the state at the start of the round, then everybody votes on the same arguments: those of the
+        # start of the round and all arguments made in it. How fact-checkers are grouped does not change the result.
+        by_strategy = {}
+        for play in plays:
+            by_strategy.setdefault(id(play[0].strategy), []).append(play)
+        batches = []
+        for batch in by_strategy.values():
+            topic = snapshot.copy()
+            found = np.zeros((len(batch), len(topic.all_evidence)), dtype=bool)
+            for b, play in enumerate(batch):
+                found[b, [e.identification for e in play[1]]] = True
+            batches.append(create_arguments(batch[0][0].strategy, [p[0] for p in batch], [topic] * len(batch),
+                                            found, np.array([p[2].validity for p in batch]), rng))
+
+        # No votes were cast yet this round, so the reputation of the sides is still that of the start of the round
+        voting_topic = TopicSnapshot(snapshot.topic)
+        for batch in batches:
+            cast_votes(batch.agents[0].strategy, batch, [voting_topic] * len(batch.agents),
+                       self.current_date, creator_rep)
+
     def retrieve_results(self):
         all_fact_checker_data = {}
         for fc in self.fact_checkers:
             # all_fact_checker_data[fc.profile[0]] = fc.history
             all_fact_checker_data[fc.identification] = fc.history
 
-        true_topics = 0
-        lie_topics = 0
-        equal_topics = 0
-        not_voted_topics = 0
-        for topic in self.all_topics:
-
-            if topic.true_votes == 0 and topic.lie_votes == 0:
-                not_voted_topics += 1
-            elif topic.true_votes > topic.lie_votes:
-                true_topics += 1
-            elif topic.lie_votes > topic.true_votes:
-                lie_topics += 1
-            else:
-                equal_topics += 1
-
-        return all_fact_checker_data, (true_topics, lie_topics, equal_topics, not_voted_topics)
+        true_topics, lie_topics, equal_topics, not_voted_topics = self.statistics.outcome_counts.tolist()
 
-    def random_topic_value(self):
-        import random
-        return random.random() * self.max_topic_ether_value
+        return all_fact_checker_data, (true_topics, lie_topics, equal_topics, not_voted_topics), self.stopping_day
 
     def remove_expired_topics(self):
         new_topics = []
+        expired_topics = []
         for topic in self.topics:
             if topic.is_expired(self.current_date):
-                topic.distribute_rewards()
+                expired_topics.append(topic)
             else:
                 new_topics.append(topic)
         self.topics = new_topics
 
+        if len(expired_topics) == 0:
+            return expired_topics
+        vote_rows = self.vote_store.settle_topics(
+            [t.identifier for t in expired_topics])
+        for topic, rows in zip(expired_topics, vote_rows):
+            topic.distribute_rewards(rows, self.statistics)
+        return expired_topics
+
     def generate_new_topics(self):
-        for i in range(self.topics_generated_per_day):
-            t = Topic(self.random_topic_value(), self.current_date,
-                      self.current_date + self.topic_duration, self.topic_index)
-            self.topics.append(t)
-            self.all_topics.append(t)
-            self.topic_index += 1
+        for r in self.requesters:
+            new_topics = r.post_topic(self.current_date, self.topic_duration,
+                                      self.max_topic_ether_value, self.topic_index, self.vote_store)
+            self.topics.extend(new_topics)
+            if self.keep_all_topics:
+                self.all_topics.extend(new_topics)
+            self.topic_index += len(new_topics)
 
         # for i in self.topics:
         #     print('reward', i.reward_pool)
         #     print('len', i.all_evidence[0].difficulty_to_find)
 
     def generate_requesters(self):
+        if self.requester_daily_posts is not None and len(self.requester_daily_posts) != self.num_requesters:
+            raise ValueError('Simulator.requester_daily_posts has %d posting rates for %d requesters (num_requesters)'
+                             % (len(self.requester_daily_posts), self.num_requesters))
         for i in range(self.num_requesters):
-            r = Requester(self.topics_generated_per_day)
+            daily_posts = self.topics_generated_per_day if self.requester_daily_posts is None else self.requester_daily_posts[i]
+            r = Requester(daily_posts)
             self.requesters.append(r)
 
     def generate_fact_checkers(self):
@@ -758,7 +1718,7 @@ class Simulator():
             honest_prob = 1  # 1 - (1/(self.num_fact_checkers - 1)) * i
             malicious_prob = 0  # 1 - honest_prob
             fc = FactChecker(index, self.num_fact_checks_daily, [
-                             honest_prob, malicious_prob])
+                             honest_prob, malicious_prob], self.vote_store, self.group_strategy('honest'))
             self.fact_checkers.append(fc)
             index += 1
 
@@ -766,7 +1726,7 @@ class Simulator():
             honest_prob = 0.5
             malicious_prob = 0.5
             fc = FactChecker(index, self.num_fact_checks_daily, [
-                             honest_prob, malicious_prob])
+                             honest_prob, malicious_prob], self.vote_store, self.group_strategy('partial'))
             self.fact_checkers.append(fc)
             index += 1
 
@@ -774,101 +1734,84 @@ class Simulator():
             honest_prob = 0
             malicious_prob = 1
             fc = FactChecker(index, self.num_fact_checks_daily, [
-                             honest_prob, malicious_prob])
+                             honest_prob, malicious_prob], self.vote_store, self.group_strategy('malicious'))
             self.fact_checkers.append(fc)
             index += 1
 
+    def group_strategy(self, group):
+        # One strategy object per name so that fact-checkers with the same strategy can decide as a batch
+        name = self.group_strategies.get(group, 'mixed')
+        if name not in self.strategy_instances:
+            self.strategy_instances[name] = strategies[name]()
+        return self.strategy_instances[name]
+
     def print_topics(self):
         for topic in self.topics:
             topic.print_details()
 
-    def save_data(self, fc_data):
-        n = str(self.num_fact_checkers)
-        np.save('fc_data_' + n, fc_data)
-        np.save('topics_data_' + n, self.all_topics)
-
-    def plot_data(self, fc_data):
-        for k, fc in fc_data.items():
-            # line 1 points
-            x1 = [x[1] for x in fc]
-            y1 = [x[2] for x in fc]
-            # plotting the line 1 points
-            profile = fc[0][4]
-            color = 'green' if profile[0] == 1 else 'purple' if profile[0] == 0.5 else 'red'
-            # plt.plot(x1, y1, label=str(fc[0][0]), color=color)  # identifier
-            plt.plot(x1, y1, color=color)  # identifier
-
-        plt.xlabel('epoch/day')
-        # Set the y axis label of the current axis.
-        plt.ylabel('ether')
-
-        # Set a title of the current axes.
-        plt.title('Ether vs Epoch')
-        # show a legend on the plot
-        # plt.legend()
-        # Display a figure.
-        plt.savefig('ether_vs_epoch' + str(self.num_fact_checkers))
-        plt.show()
-        plt.clf()
-
-        for k, fc in fc_data.items():
-            # line 1 points
-            x1 = [x[1] for x in fc]
-            y1 = [x[3] for x in fc]
-            # plotting the line 1 points
-            profile = fc[0][4]
-            color = 'green' if profile[0] == 1 else 'purple' if profile[0] == 0.5 else 'red'
-            # plt.plot(x1, y1, label=str(fc[0][0]), color=color)  # identifier
-            plt.plot(x1, y1, color=color)  # identifier
+    # All history rows of all fact-checkers as a numeric array with columns [id, day, ether, rep, honest probability]
+    def history_array(self):
+        return history_to_array(fc.history for fc in self.fact_checkers)
+
+    # Ether or reputation (column of history_array) of every fact-checker over time, coloured by strategy class.
+    # 'lines' draws one LineCollection per class, 'bands' draws per-class quantile bands (cost follows days, not agents).
+    def plot_trajectories(self, history, column, ylabel, title, filename):
+        from matplotlib.collections import LineCollection
+        mode = self.trajectory_mode
+        if mode == 'auto':
+            mode = 'bands' if len(self.fact_checkers) > self.trajectory_band_threshold else 'lines'
+
+        ax = plt.gca()
+        # Rows of one fact-checker next to each other, ordered by day
+        history = history[np.lexsort((history[:, 1], history[:, 0]))]
+        for honest_prob in np.unique(history[:, 4]):
+            rows = history[history[:, 4] == honest_prob]
+            num_agents = len(np.unique(rows[:, 0]))
+            days = rows[:, 1].reshape(num_agents, -1)
+            values = rows[:, column].reshape(num_agents, -1)
+            color = 'green' if honest_prob == 1 else 'purple' if honest_prob == 0.5 else 'red'
+
+            if mode == 'bands':
+                low, q1, median, q3, high = np.quantile(
+                    values, [0.05, 0.25, 0.5, 0.75, 0.95], axis=0)
+                ax.fill_between(days[0], low, high, color=color, alpha=0.15, linewidth=0)
+                ax.fill_between(days[0], q1, q3, color=color, alpha=0.35, linewidth=0)
+                ax.plot(days[0], median, color=color)
+            else:
+                ax.add_collection(LineCollection(
+                    np.stack((days, values), axis=-1), colors=color))
+        ax.autoscale_view()
 
         plt.xlabel('epoch/day')
         # Set the y axis label of the current axis.
-        plt.ylabel('reputation')
+        plt.ylabel(ylabel)
 
         # Set a title of the current axes.
-        plt.title('Reputation vs Epoch')
-        # show a legend on the plot
-        # plt.legend()
+        plt.title(title)
         # Display a figure.
-        plt.savefig('reputation_vs_epoch' + str(self.num_fact_checkers))
+        plt.savefig(filename)
         plt.show()
         plt.clf()
 
-        true_topics = []
-        lie_topics = []
-        equal_topics = []
-        not_voted_topics = []
-        temp = [true_topics, lie_topics, equal_topics, not_voted_topics]
-        for topic in self.all_topics:
-
-            r = topic.initial_reward
-            if topic.true_votes == 0 and topic.lie_votes == 0:
-                not_voted_topics.append(r)
-            elif topic.true_votes > topic.lie_votes:
-                true_topics.append(r)
-            elif topic.lie_votes > topic.true_votes:
-                lie_topics.append(r)
-            else:
-                equal_topics.append(r)
+    def save_data(self, fc_data):
+        n = str(self.num_fact_checkers)
+        np.save('fc_data_' + n, fc_data)
+        np.save('topics_data_' + n, self.all_topics)
 
-        bins = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0001]
+    def plot_data(self, fc_data):
+        history = history_to_array(fc_data.values())
+        self.plot_trajectories(history, 2, 'ether', 'Ether vs Epoch',
+                               'ether_vs_epoch' + str(self.num_fact_checkers))
+        self.plot_trajectories(history, 3, 'reputation', 'Reputation vs Epoch',
+                               'reputation_vs_epoch' + str(self.num_fact_checkers))
 
-        binned_results = []
-        for idx, array in enumerate(temp):
-            binned = [[], [], [], [], [], [], [], [], [], []]
-            for initial_val in array:
-                for i in range(len(bins) - 1):
-                    if initial_val >= bins[i] and initial_val < bins[i+1]:
-                        binned[i].append(initial_val)
-            binned_results.append(binned)
-            print(binned_results[idx])
+        bins = self.statistics.bins
+        for idx, label in enumerate(['Success', 'Failure', 'Tie', 'No Votes']):
+            print(label, self.statistics.binned_outcomes[:, idx].tolist())
 
         print("Success Rates for bins")
-        success_rates = []
-        for x in range(len(bins) - 1):
-            success_rates.append(len(binned_results[0][x]) /
-                                 (len(binned_results[0][x]) + len(binned_results[1][x]) +
-                                  len(binned_results[2][x]) + len(binned_results[3][x])))
+        success_rates = self.statistics.success_rates()
+        print(success_rates.tolist())
 
         # line 1 points
         x1 = bins[1:]
@@ -892,7 +1835,7 @@ class Simulator():
         # PIE CHART
         # Pie chart, where the slices will be ordered and plotted counter-clockwise:
         labels = 'Success', 'Failure', 'Tie', 'No Votes'
-        sizes = [len(x) for x in temp]
+        sizes = self.statistics.outcome_counts.tolist()
         total = sum(sizes)
         explode = (0, 0, 0, 0)  # only "explode" the 2nd slice (i.e. 'Hogs')
 
@@ -915,20 +1858,7 @@ class Simulator():
         plt.clf()
 
         # Votes
-        all_topics_binned = [[], [], [], [], [], [], [], [], [], []]
-        for t in self.all_topics:
-            initial_val = t.initial_reward
-            for i in range(len(bins) - 1):
-                if initial_val >= bins[i] and initial_val < bins[i+1]:
-                    all_topics_binned[i].append(t)
-
-        average_votes_per_bin = []
-        for arr in all_topics_binned:
-            total_for_bin = 0
-            for t in arr:
-                total_for_bin += len(t.voters)
-
-            average_votes_per_bin.append(total_for_bin/len(arr))
+        average_votes_per_bin = self.statistics.average_votes()
 
         # line 1 points
         x1 = bins[1:]
@@ -950,26 +1880,640 @@ class Simulator():
         plt.clf()
 
 
+# History rows [id, day, ether, rep, profile] of several fact-checkers as a numeric array with columns
+# [id, day, ether, rep, honest probability]
+def history_to_array(histories):
+    rows = [[r[0], r[1], r[2], r[3], r[4][0]]
+            for history in histories for r in history]
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+
+# Scenario files and headless batch execution
+#
+# A scenario file is JSON. Parameters are the settings among the class attributes above (not methods or
+# state_attributes), named "Class.attribute":
+# {
+#     "name": "population_sweep",
+#     "seed": 0,                                  # base seed, each run's seed is derived from it, the grid point and replicate
+#     "parameters": {"Simulator.total_days": 100, "FactChecker.transaction_cost": 0.0089},
+#     "sweep": {"Simulator.num_fact_checkers": [10, 20, 50]},   # optional grid, every combination is run
+#     "replicates": 5,                            # optional, runs per grid point
+#     "convergence": {"window": 20, "tolerance": 0.1}          # optional ConvergenceMonitor settings
+# }
+# Without "sweep" and "replicates" the scenario is a single run.
+
+def scenario_classes():
+    return {'Simulator': Simulator, 'FactChecker': FactChecker, 'Topic': Topic, 'Requester': Requester}
+
+
+# Class attributes that only give the state of a run or of its objects a default. They are set for every object
+# when it is created (or during the run), so they are not scenario parameters. Some are set by another parameter.
+state_attributes = {
+    'Simulator.requesters': None, 'Simulator.fact_checkers': None, 'Simulator.all_topics': None,
+    'Simulator.topics': None, 'Simulator.current_date': None, 'Simulator.stopping_day': None,
+    'Simulator.convergence_monitor': 'the "convergence" settings of the scenario',
+    'Simulator.metrics_publisher': '--metrics',
+    'FactChecker.daily_fact_checks': 'Simulator.num_fact_checks_daily',
+    'FactChecker.profile': None, 'FactChecker.rep': None, 'FactChecker.identification': None,
+    'FactChecker.history': None,
+    'Requester.daily_posts': 'Simulator.requester_daily_posts'}
+
+
+def load_scenario(path):
+    import json
+    with open(path) as f:
+        scenario = json.load(f)
+
+    parameters = result_parameters() + list(non_result_parameters)
+    for key in list(scenario.get('parameters', {})) + list(scenario.get('sweep', {})):
+        if key in state_attributes:
+            message = key + ' is set by the simulation itself and is not a scenario parameter'
+            if state_attributes[key] is not None:
+                message += ', use ' + state_attributes[key]
+            raise ValueError(message)
+        if key not in parameters:
+            raise ValueError('Unknown scenario parameter: ' + key)
+    return scenario
+
+
+# Expand a scenario into one job per grid point and replicate
+def scenario_jobs(scenario):
+    import hashlib
+    import itertools
+    import json
+    sweep = scenario.get('sweep', {})
+    keys = sorted(sweep)
+    replicates = scenario.get('replicates', 1)
+    seed = scenario.get('seed', 0)
+
+    jobs = []
+    for values in itertools.product(*[sweep[k] for k in keys]):
+        for replicate in range(replicates):
+            parameters = dict(scenario.get('parameters', {}))
+            parameters.update(zip(keys, values))
+            # The seed does not depend on the position in the grid, so adding grid points keeps the other runs (and their cached results) the same
+            point = json.dumps([seed, list(zip(keys, values)), replicate])
+            run_seed = int(hashlib.sha256(point.encode()).hexdigest()[:8], 16)
+            jobs.append({'run': len(jobs), 'seed': run_seed, 'replicate': replicate,
+                         'parameters': parameters, 'convergence': scenario.get('convergence')})
+    return jobs
+
+
+def simulate_job(job):
+    import random
+    classes = scenario_classes()
+
+    # Parameters are class attributes, remember the defaults so that runs in the same process do not leak into each other
+    defaults = []
+    for key, value in job['parameters'].items():
+        class_name, _, attribute = key.partition('.')
+        cls = classes[class_name]
+        defaults.append((cls, attribute, cls.__dict__.get(attribute)))
+        setattr(cls, attribute, value)
+
+    try:
+        np.random.seed(job['seed'])
+        random.seed(job['seed'])
+        s = Simulator()
+        if job.get('convergence') is not None:
+            s.convergence_monitor = ConvergenceMonitor(**job['convergence'])
+        if job.get('metrics') is not None:
+            s.metrics_publisher = MetricsPublisher(
+                path=job['metrics'], run_id=job['run'])
+        s.run_simulation()
+        _, topic_data, stopping_day = s.retrieve_results()
+        history = s.history_array()
+        strategy_summaries = s.statistics.strategy_summaries()
+    finally:
+        for cls, attribute, value in reversed(defaults):
+            setattr(cls, attribute, value)
+
+    summary = dict(job)
+    summary['topics'] = dict(
+        zip(['truth', 'lie', 'tie', 'no_votes'], topic_data))
+    summary['stopping_day'] = stopping_day
+    # Keyed by honest probability
+    summary['strategies'] = {str(k): v for k, v in strategy_summaries.items()}
+    return summary, history
+
+
+def run_job(job, output_dir=None, cache=None):
+    summary, history = cached_simulate_job(job, cache)
+    if output_dir is not None:
+        import os
+        summary['history_file'] = 'history_%d.npy' % job['run']
+        np.save(os.path.join(output_dir, summary['history_file']), history)
+    return summary
+
+
+def run_scenario(scenario, output_dir, workers=1, metrics=None, cache=None):
+    import functools
+    import json
+    import multiprocessing
+    import os
+
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = scenario_jobs(scenario)
+    for job in jobs:
+        job['metrics'] = metrics
+    run = functools.partial(run_job, output_dir=output_dir, cache=cache)
+
+    with open(os.path.join(output_dir, 'results.jsonl'), 'w') as f:
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                for summary in pool.imap(run, jobs):
+                    f.write(json.dumps(summary) + '\n')
+        else:
+            for summary in map(run, jobs):
+                f.write(json.dumps(summary) + '\n')
+    return len(jobs)
+
+
+# Columnar run results: one array per history column plus the run summary as JSON
+def save_columns(path, summary, history):
+    import json
+    np.savez(path, run=np.full(len(history), summary['run']), fact_checker=history[:, 0], day=history[:, 1],
+             ether=history[:, 2], rep=history[:, 3], honest_prob=history[:, 4], summary=json.dumps(summary))
+
+
+def load_columns(path):
+    import json
+    with np.load(path) as data:
+        return json.loads(str(data['summary'])), {key: data[key] for key in data.files if key != 'summary'}
+
+
+# Content-addressed result cache
+#
+# A run is identified by its parameters (every class attribute of the scenario classes except non_result_parameters
+# and state_attributes, after the job's overrides), its seed, its convergence settings and a hash of the simulation code (code_version: every
+# class and function of this file except non_simulation_code). Chart settings, memory settings (keep_all_topics) and
+# pool sizes do not change results, and neither do charts, the CLI, the cache and the work queue, so changing them
+# keeps the cached results. Anything added to the file is part of the key unless it is added to these lists. Results
+# are stored as <key>.npz (see save_columns). Reading a result marks it as recently used, and the least recently used
+# results are removed when the directory grows beyond max_bytes.
+non_result_parameters = (
+    'Simulator.trajectory_mode', 'Simulator.trajectory_band_threshold', 'Simulator.keep_all_topics',
+    'Simulator.search_workers', 'Simulator.search_pool')
+
+non_simulation_code = (
+    'Simulator.plot_trajectories', 'Simulator.plot_data', 'Simulator.save_data', 'Simulator.print_topics',
+    'MetricsPublisher', 'load_scenario', 'scenario_jobs', 'run_job', 'run_scenario', 'save_columns', 'load_columns',
+    'simulation_code', 'code_version', 'result_parameters', 'effective_parameters', 'ResultCache',
+    'cached_simulate_job', 'WorkQueue', 'queue_worker', 'run_queue_workers', 'merge_queue_results', 'open_cache',
+    'parse_args', 'run_queue_role', 'main')
+
+
+def simulation_code():
+    # Sources of everything that decides the results of a run, by name
+    import inspect
+    code = {}
+    for name, obj in globals().items():
+        if not (inspect.isclass(obj) or inspect.isfunction(obj)) or obj.__module__ != __name__ \
+                or name in non_simulation_code:
+            continue
+        if inspect.isfunction(obj):
+            code[name] = inspect.getsource(obj)
+            continue
+        # Classes by member, so that the chart methods of the Simulator can be left out. Class attributes of the
+        # scenario classes are parameters and part of the key already.
+        code[name] = 'class %s(%s)' % (name, ', '.join(base.__name__ for base in obj.__bases__))
+        for attribute, value in vars(obj).items():
+            key = name + '.' + attribute
+            if key in non_simulation_code or inspect.isdatadescriptor(value):
+                continue
+            if inspect.isfunction(value):
+                code[key] = inspect.getsource(value)
+            elif not attribute.startswith('__') and name not in scenario_classes():
+                code[key] = repr(value)
+    return code
+
+
+def code_version():
+    import hashlib
+    global source_hash
+    if source_hash is None:
+        code = simulation_code()
+        source_hash = hashlib.sha256(
+            '\n'.join(code[name] for name in sorted(code)).encode()).hexdigest()
+    return source_hash
+
+
+source_hash = None
+
+
+def result_parameters():
+    import inspect
+    return [class_name + '.' + attribute
+            for class_name, cls in scenario_classes().items() for attribute, value in vars(cls).items()
+            if not attribute.startswith('__') and not callable(value) and not inspect.isdatadescriptor(value)
+            and class_name + '.' + attribute not in non_result_parameters
+            and class_name + '.' + attribute not in state_attributes]
+
+
+def effective_parameters(job):
+    classes = scenario_classes()
+    keys = result_parameters()
+    parameters = {}
+    for key in keys:
+        class_name, _, attribute = key.partition('.')
+        parameters[key] = getattr(classes[class_name], attribute)
+    parameters.update((key, value) for key, value in job['parameters'].items()
+                      if key in keys)
+    return parameters
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=2**30):
+        import os
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def key(self, job):
+        import hashlib
+        import json
+        content = json.dumps({'parameters': effective_parameters(job), 'seed': job['seed'],
+                              'convergence': job.get('convergence'), 'code': code_version()}, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path(self, key):
+        import os
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, job):
+        import os
+        path = self.path(self.key(job))
+        try:
+            summary, columns = load_columns(path)
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        history = np.stack([columns['fact_checker'], columns['day'], columns['ether'],
+                            columns['rep'], columns['honest_prob']], axis=1)
+        return summary, history
+
+    def put(self, job, summary, history):
+        import os
+        path = self.path(self.key(job))
+        tmp = '%s.%d.tmp.npz' % (path, os.getpid())
+        save_columns(tmp, summary, history)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        import os
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz') or '.tmp' in name:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+def cached_simulate_job(job, cache=None):
+    if cache is not None:
+        cached = cache.get(job)
+        if cached is not None:
+            summary, history = cached
+            # The cached run may have had another position in its sweep
+            summary.update(job)
+            summary['cached'] = True
+            history = history.copy()
+            return summary, history
+    summary, history = simulate_job(job)
+    if cache is not None:
+        cache.put(job, summary, history)
+    return summary, history
+
+
+# Scale-out over several machines
+#
+# The coordinator splits a scenario into work units (one per job) inside a queue directory on a shared filesystem.
+# Workers on any node claim units, simulate them and write one columnar .npz per unit. A local directory is the
+# stand-in for tests and single-box use. Layout of the queue directory:
+#     pending/unit_<run>.json    waiting to be claimed
+#     claimed/unit_<run>.json    being simulated (file mtime is the worker's heartbeat)
+#     done/unit_<run>.json       finished
+#     failed/unit_<run>.json     the simulation raised an exception (traceback is stored in the unit)
+#     results/unit_<run>.npz     history columns and the run summary
+# Claims are atomic renames, so only one worker gets a unit. A claim whose heartbeat is older than lease_seconds
+# belongs to a crashed worker and is put back into pending (into failed after max_attempts expired claims). Results
+# are published with a hard link, which fails if the result already exists, so a unit that ends up being simulated
+# twice is still only recorded once.
+class WorkQueue:
+    states = ('pending', 'claimed', 'done', 'failed', 'results')
+    max_attempts = 3  # expired claims before a unit is moved to failed/
+
+    def __init__(self, directory, lease_seconds=600):
+        import os
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        for state in self.states:
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def path(self, state, name):
+        import os
+        return os.path.join(self.directory, state, name)
+
+    def units(self, state):
+        import os
+        return sorted(os.listdir(os.path.join(self.directory, state)))
+
+    def submit(self, jobs):
+        import json
+        import os
+        for job in jobs:
+            name = 'unit_%06d.json' % job['run']
+            # Submitting the same sweep again only adds the missing units
+            if any(os.path.exists(self.path(state, name)) for state in ('pending', 'claimed', 'done')):
+                continue
+            unit = dict(job)
+            unit['attempts'] = 0
+            tmp = self.path('pending', '.' + name + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(unit, f)
+            os.replace(tmp, self.path('pending', name))
+
+    def claim(self):
+        import json
+        import os
+        for name in self.units('pending'):
+            if name.startswith('.'):
+                continue
+            # Touch before the rename: the rename keeps the mtime, and a claim must not look stale from the start
+            try:
+                os.utime(self.path('pending', name))
+                os.rename(self.path('pending', name),
+                          self.path('claimed', name))
+            except OSError:
+                continue  # another worker was faster
+            if os.path.exists(self.path('results', name.replace('.json', '.npz'))):
+                self.finish(name, 'done')  # an earlier claim finished after it was requeued
+                continue
+            try:
+                with open(self.path('claimed', name)) as f:
+                    return name, json.load(f)
+            except OSError:
+                continue  # the claim was lost (requeued) right away
+        return None, None
+
+    def heartbeat(self, name):
+        import os
+        try:
+            os.utime(self.path('claimed', name))
+        except OSError:
+            pass
+
+    def complete(self, name, summary, history):
+        import json
+        import os
+        result = self.path('results', name.replace('.json', '.npz'))
+        tmp = self.path('results', '.%s.%d.tmp.npz' % (name, os.getpid()))
+        save_columns(tmp, summary, history)
+        try:
+            os.link(tmp, result)
+        except FileExistsError:
+            pass  # a retried copy of this unit already finished
+        finally:
+            os.remove(tmp)
+        self.finish(name, 'done')
+
+    def fail(self, name, unit, error):
+        import json
+        if not self.finish(name, 'failed'):
+            return
+        unit['error'] = error
+        with open(self.path('failed', name), 'w') as f:
+            json.dump(unit, f)
+
+    def finish(self, name, state):
+        # Returns False if the claim was lost (it expired and was moved by someone else)
+        import os
+        try:
+            os.replace(self.path('claimed', name), self.path(state, name))
+        except OSError:
+            return False
+        return True
+
+    def requeue_stale(self):
+        import json
+        import os
+        import time
+        now = time.time()
+        # A process that died while requeuing leaves its .stale file behind, make it a stale claim again
+        for name in self.units('claimed'):
+            if name.startswith('.') and name.endswith('.json.stale'):
+                unit_name = name[1:-len('.stale')]
+                try:
+                    if now - os.path.getmtime(self.path('claimed', name)) < self.lease_seconds:
+                        continue
+                    if any(os.path.exists(self.path(state, unit_name)) for state in ('pending', 'done', 'failed')):
+                        os.remove(self.path('claimed', name))  # it died after moving the unit on
+                    else:
+                        os.rename(self.path('claimed', name),
+                                  self.path('claimed', unit_name))
+                except OSError:
+                    continue
+
+        for name in self.units('claimed'):
+            if name.startswith('.'):
+                continue
+            try:
+                if now - os.path.getmtime(self.path('claimed', name)) < self.lease_seconds:
+                    continue
+                # Move the claim away first so that only one process requeues it. It is touched first so that an
+                # unfinished .stale file only counts as left behind once it is older than the lease.
+                stale = self.path('claimed', '.' + name + '.stale')
+                os.utime(self.path('claimed', name))
+                os.rename(self.path('claimed', name), stale)
+            except OSError:
+                continue
+            if os.path.exists(self.path('results', name.replace('.json', '.npz'))):
+                os.replace(stale, self.path('done', name))
+                continue
+            with open(stale) as f:
+                unit = json.load(f)
+            unit['attempts'] += 1
+            # A unit that keeps killing its worker (out of memory, segfault) is given up on
+            state = 'pending'
+            if unit['attempts'] >= self.max_attempts:
+                state = 'failed'
+                unit['error'] = 'claim expired %d times, the workers running it died' % unit['attempts']
+            tmp = self.path(state, '.' + name + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(unit, f)
+            os.replace(tmp, self.path(state, name))
+            os.remove(stale)
+
+    def status(self):
+        # Units that are being requeued (.stale) still count as claimed
+        return {state: len([n for n in self.units(state) if not n.startswith('.') or n.endswith('.json.stale')])
+                for state in self.states}
+
+
+def queue_worker(queue_dir, lease_seconds=600, poll_seconds=5, metrics=None, cache=None):
+    import threading
+    import time
+    import traceback
+    queue = WorkQueue(queue_dir, lease_seconds)
+    num_units = 0
+
+    while True:
+        queue.requeue_stale()
+        name, unit = queue.claim()
+        if name is None:
+            # Units claimed by other workers may still come back if those workers crash
+            if queue.status()['claimed'] == 0:
+                return num_units
+            time.sleep(poll_seconds)
+            continue
+
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(lease_seconds / 4):
+                queue.heartbeat(name)
+        heart = threading.Thread(target=beat, daemon=True)
+        heart.start()
+        try:
+            unit['metrics'] = metrics
+            summary, history = cached_simulate_job(unit, cache)
+            queue.complete(name, summary, history)
+        except Exception:
+            queue.fail(name, unit, traceback.format_exc())
+        finally:
+            stop.set()
+            heart.join()
+        num_units += 1
+
+
+def run_queue_workers(queue_dir, workers=1, lease_seconds=600, metrics=None, cache=None):
+    import multiprocessing
+    if workers <= 1:
+        return queue_worker(queue_dir, lease_seconds, metrics=metrics, cache=cache)
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.starmap(queue_worker, [(queue_dir, lease_seconds, 5, metrics, cache)] * workers))
+
+
+# Merge the per-unit results into results.jsonl and one columnar history.npz
+def merge_queue_results(queue_dir, output_dir):
+    import json
+    import os
+    queue = WorkQueue(queue_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    columns = {}
+    summaries = []
+    for name in queue.units('results'):
+        if name.startswith('.'):
+            continue
+        summary, data = load_columns(queue.path('results', name))
+        summaries.append(summary)
+        for key, column in data.items():
+            columns.setdefault(key, []).append(column)
+
+    with open(os.path.join(output_dir, 'results.jsonl'), 'w') as f:
+        for summary in sorted(summaries, key=lambda x: x['run']):
+            f.write(json.dumps(summary) + '\n')
+    np.savez(os.path.join(output_dir, 'history.npz'),
+             **{k: np.concatenate(v) for k, v in columns.items()})
+    return len(summaries)
+
+
+def open_cache(args):
+    if args.cache is None:
+        return None
+    return ResultCache(args.cache, int(args.cache_size * 2**20))
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Fact-checking game simulation. Without a scenario a single run is simulated and plotted.')
+    parser.add_argument('scenario', nargs='?',
+                        help='JSON scenario file to run headless')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='number of worker processes')
+    parser.add_argument('-o', '--output', default='results',
+                        help='directory for results.jsonl and the history_<run>.npy files')
+    parser.add_argument('--metrics',
+                        help='JSON-lines file that receives per-day progress of every run (follow it with tail -f)')
+    parser.add_argument('--cache',
+                        help='result cache directory, runs whose configuration, seed and code were simulated before are loaded from it')
+    parser.add_argument('--cache-size', type=float, default=1024,
+                        help='maximum size of the result cache in MB (least recently used results are removed first)')
+    parser.add_argument('--queue',
+                        help='shared queue directory for running a scenario on several machines')
+    parser.add_argument('--role', choices=['submit', 'work', 'merge', 'status'],
+                        help='submit the scenario to the queue, work on queued units, merge the results or show progress')
+    parser.add_argument('--lease', type=float, default=600,
+                        help='seconds without a heartbeat after which a claimed unit is run again')
+    return parser.parse_args(argv)
+
+
+def run_queue_role(args):
+    queue = WorkQueue(args.queue, args.lease)
+    if args.role == 'submit':
+        if args.scenario is None:
+            print('ERROR: submit needs a scenario file')
+            exit(1)
+        queue.submit(scenario_jobs(load_scenario(args.scenario)))
+    elif args.role == 'work':
+        print('Simulated', run_queue_workers(
+            args.queue, args.workers, args.lease, args.metrics, open_cache(args)), 'units')
+    elif args.role == 'merge':
+        queue.requeue_stale()
+        status = queue.status()
+        if status['pending'] + status['claimed'] > 0:
+            print('WARNING: merging an unfinished queue', status)
+        print('Merged', merge_queue_results(
+            args.queue, args.output), 'units into', args.output)
+    print('Queue:', queue.status())
+
+
 def main():
+    args = parse_args()
+    if args.queue is not None:
+        if args.role is None:
+            print('ERROR: --queue needs a --role')
+            exit(1)
+        run_queue_role(args)
+        return
+
+    if args.scenario is not None:
+        scenario = load_scenario(args.scenario)
+        num_runs = run_scenario(
+            scenario, args.output, args.workers, args.metrics, open_cache(args))
+        print('Finished', num_runs, 'runs of', scenario.get(
+            'name', args.scenario), 'in', args.output)
+        return
+
     s = Simulator()
     s.run_simulation()
 
-    fact_checker_data, topic_data = s.retrieve_results()
+    fact_checker_data, topic_data, stopping_day = s.retrieve_results()
     # for k, v in fact_checker_data.items():
     #     print('-' * 50)
     #     print(v)
     print('Topic Data:', topic_data)
-
-    # print('x' * 50)
-    # global important_votes
-    # print(important_votes)
+    if stopping_day is not None:
+        print('Converged on day', stopping_day)
 
     s.save_data(fact_checker_data)
     s.plot_data(fact_checker_data)
-    # print('-' * 50)
-    # global all_times
-    # print(all_times)
-
     # print('Hello World!')
     # s.generate_new_topics()
     # print(len(s.topics))
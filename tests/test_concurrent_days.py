@@ -0,0 +1,74 @@
+# Concurrent (simultaneous-move) day mode: how fact-checkers are grouped into strategy batches must not matter
+import importlib.util
+import os
+import random
+import sys
+
+import numpy as np
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+
+def votes(simulator):
+    store = simulator.vote_store
+    return [(int(store.agent[i]), bool(store.side[i]), float(store.eth[i])) for i in range(store.num_votes)]
+
+
+def play_round(shared_strategy):
+    # Two honest fact-checkers on an empty topic, the second one only found the weakest true evidence
+    np.random.seed(0)
+    random.seed(0)
+    s = game.Simulator()
+    first, second = s.fact_checkers[0], s.fact_checkers[1]
+    if shared_strategy:
+        first.strategy = second.strategy = game.HonestStrategy()
+    else:
+        first.strategy, second.strategy = game.HonestStrategy(), game.HonestStrategy()
+    topic = game.Topic(1.0, 0, 5, 0, s.vote_store)
+    strong = [topic.all_evidence[i] for i in (0, 1, 2)]
+    weak = [topic.all_evidence[19]]
+    plays = [(first, strong, strong[0]), (second, weak, weak[0])]
+    creator_rep = np.array([a.rep for a in s.vote_store.agents])
+    s.play_topic(game.TopicSnapshot(topic), plays, creator_rep, np.random.default_rng(0))
+    return topic, votes(s)
+
+
+def test_batching_does_not_change_which_arguments_can_be_voted_on():
+    shared_topic, shared_votes = play_round(shared_strategy=True)
+    separate_topic, separate_votes = play_round(shared_strategy=False)
+    assert len(shared_topic.arguments) == len(separate_topic.arguments) == 2
+    assert [agent for agent, _, _ in shared_votes] == [0, 1]
+    assert shared_votes == separate_votes
+
+
+def run(monkeypatch, per_agent_strategies):
+    monkeypatch.setattr(game.Simulator, 'concurrent_days', True)
+    monkeypatch.setattr(game.Simulator, 'num_fact_checkers', 40)
+    monkeypatch.setattr(game.Simulator, 'total_days', 20)
+    monkeypatch.setattr(game.Simulator, 'group_strategies',
+                        {'honest': 'honest', 'partial': 'honest', 'malicious': 'malicious'})
+    if per_agent_strategies:
+        # Same behaviour, but every fact-checker is its own batch
+        monkeypatch.setattr(game.Simulator, 'group_strategy',
+                            lambda self, group: game.strategies[self.group_strategies[group]]())
+    np.random.seed(2)
+    random.seed(2)
+    s = game.Simulator()
+    s.run_simulation()
+    return s.retrieve_results()[1], votes(s), s.history_array()
+
+
+def test_grouping_does_not_change_results(monkeypatch):
+    grouped = run(monkeypatch, per_agent_strategies=False)
+    separate = run(monkeypatch, per_agent_strategies=True)
+    assert grouped[0] == separate[0]
+    # Batches vote one after another, so only the order of the vote rows (and of float sums) may differ
+    grouped_votes, separate_votes = sorted(grouped[1]), sorted(separate[1])
+    assert [v[:2] for v in grouped_votes] == [v[:2] for v in separate_votes]
+    np.testing.assert_allclose([v[2] for v in grouped_votes], [v[2] for v in separate_votes])
+    np.testing.assert_allclose(grouped[2], separate[2])
@@ -0,0 +1,70 @@
+# EvidenceCatalog.sample_found against the model of Topic.retrieve_evidence. The two draw from different random
+# generators, so they are compared statistically (seeded, with tolerances of several standard errors).
+import importlib.util
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+TRIALS = 4000
+
+
+def assert_rates_close(rates, expected, trials):
+    # Within 5 standard errors of a binomial rate
+    error = 5 * np.sqrt(expected * (1 - expected) / trials) + 1e-9
+    assert np.all(np.abs(rates - expected) <= error), (rates, expected)
+
+
+def assert_same_rates(rates, other_rates, trials):
+    # Both rates are estimated: within 5 standard errors of the difference, using the pooled rate
+    pooled = (rates + other_rates) / 2
+    error = 5 * np.sqrt(2 * pooled * (1 - pooled) / trials) + 1e-9
+    assert np.all(np.abs(rates - other_rates) <= error), (rates, other_rates)
+
+
+@pytest.mark.parametrize('rounds', [1, 3, 10])
+def test_find_rate_of_each_item(rounds):
+    catalog = game.EvidenceCatalog(6, 6)
+    rng = np.random.default_rng(rounds)
+    counts = np.zeros(len(catalog.evidence))
+    for _ in range(TRIALS):
+        found = catalog.sample_found(rounds, rng)
+        assert len(set(found.tolist())) == len(found)
+        counts[found] += 1
+    p = np.array([e.difficulty_to_find for e in catalog.evidence])
+    assert_rates_close(counts / TRIALS, 1 - (1 - p) ** rounds, TRIALS)
+
+
+def search(monkeypatch, indexed, rounds):
+    # Best evidence and first item found of TRIALS searches through Topic.retrieve_evidence
+    monkeypatch.setattr(game.Topic, 'num_true_evidence', 4)
+    monkeypatch.setattr(game.Topic, 'num_fake_evidence', 4)
+    monkeypatch.setattr(game.Topic, 'indexed_evidence_search', indexed)
+    np.random.seed(1)
+    random.seed(1)
+    topic = game.Topic(1.0, 0, 5, 0, game.VoteStore())
+    best = np.zeros(len(topic.all_evidence) + 1)  # last: nothing found
+    first = np.zeros(len(topic.all_evidence) + 1)
+    for _ in range(TRIALS):
+        found = topic.retrieve_evidence(rounds - 1)
+        evidence = topic.evidence_catalog.most_convincing(found)
+        best[-1 if evidence is None else evidence.identification] += 1
+        first[found[0].identification if found else -1] += 1
+    return best / TRIALS, first / TRIALS
+
+
+@pytest.mark.parametrize('rounds', [1, 4])
+def test_same_best_evidence_and_found_order_as_the_round_by_round_search(monkeypatch, rounds):
+    best, first = search(monkeypatch, indexed=False, rounds=rounds)
+    indexed_best, indexed_first = search(monkeypatch, indexed=True, rounds=rounds)
+    assert_same_rates(indexed_best, best, TRIALS)
+    assert_same_rates(indexed_first, first, TRIALS)
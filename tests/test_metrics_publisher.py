@@ -0,0 +1,38 @@
+# MetricsPublisher must never hold up the simulation
+import importlib.util
+import os
+import sys
+import threading
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+
+def test_dead_writer_does_not_block_close(tmp_path, capsys):
+    publisher = game.MetricsPublisher(path=str(tmp_path / 'missing' / 'm.jsonl'), max_queued=5)
+    publisher.start()
+    publisher.thread.join()  # the file cannot be opened
+    for day in range(30):
+        publisher.publish({'day': day})
+
+    closer = threading.Thread(target=publisher.close, daemon=True)
+    closer.start()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert isinstance(publisher.error, OSError)
+    assert capsys.readouterr().out.count('ERROR') == 1
+
+
+def test_lines_are_written(tmp_path):
+    path = tmp_path / 'm.jsonl'
+    publisher = game.MetricsPublisher(path=str(path), run_id=3)
+    publisher.start()
+    for day in range(4):
+        publisher.publish({'day': day})
+    publisher.close()
+    assert publisher.error is None
+    assert len(path.read_text().splitlines()) == 4
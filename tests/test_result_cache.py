@@ -0,0 +1,72 @@
+# ResultCache: what goes into the key, and least recently used eviction
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+
+
+def load_game(path, name='game_theory'):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+game = load_game(SOURCE)
+
+
+def job(seed=1, **parameters):
+    return {'run': 0, 'seed': seed, 'parameters': parameters, 'convergence': None}
+
+
+def edited_code_version(tmp_path, old, new):
+    with open(SOURCE) as f:
+        source = f.read()
+    assert old in source
+    path = tmp_path / 'edited.py'
+    path.write_text(source.replace(old, new, 1))
+    return load_game(str(path), 'game_theory_edited').code_version()
+
+
+def test_key_changes_with_result_parameters(tmp_path):
+    cache = game.ResultCache(str(tmp_path))
+    key = cache.key(job())
+    assert cache.key(job(**{'Simulator.total_days': 7})) != key
+    assert cache.key(job(**{'Topic.indexed_evidence_search': True})) != key
+    assert cache.key(job(seed=2)) != key
+    # Chart and pool settings keep the cached results
+    assert cache.key(job(**{'Simulator.trajectory_mode': 'bands', 'Simulator.search_workers': 8})) == key
+
+
+def test_key_changes_with_model_code(tmp_path):
+    version = game.code_version()
+    # The concurrent mode plays rounds against TopicSnapshots
+    snapshot_line = '        self.rep_for_truth = topic.rep_for_truth\n'
+    assert edited_code_version(tmp_path, snapshot_line, snapshot_line + '        self.rep_for_truth += 1\n') != version
+    # Charts are not part of the code
+    chart_line = '    def plot_data(self'
+    assert edited_code_version(tmp_path, chart_line, '    # Pie charts\n' + chart_line) == version
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = game.ResultCache(str(tmp_path))
+    jobs = [job(seed=seed) for seed in range(3)]
+    now = time.time()
+    for age, j in zip((300, 200, 100), jobs):
+        cache.put(j, {'run': 0}, np.zeros((4, 5)))
+        path = cache.path(cache.key(j))
+        os.utime(path, (now - age, now - age))
+    sizes = [os.path.getsize(cache.path(cache.key(j))) for j in jobs]
+
+    assert cache.get(jobs[0]) is not None  # the oldest result is used again
+    cache.max_bytes = sum(sizes) - min(sizes)
+    cache.evict()
+    assert cache.get(jobs[1]) is None
+    assert cache.get(jobs[0]) is not None
+    assert cache.get(jobs[2]) is not None
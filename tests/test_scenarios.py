@@ -0,0 +1,53 @@
+# Scenario files: only settings can be parameters
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+
+def load(tmp_path, parameters):
+    path = tmp_path / 'scenario.json'
+    path.write_text(json.dumps({'name': 'test', 'parameters': parameters}))
+    return game.load_scenario(str(path))
+
+
+def test_settings_are_accepted(tmp_path):
+    parameters = {'Simulator.total_days': 5, 'FactChecker.transaction_cost': 0.01,
+                  'Topic.indexed_evidence_search': True, 'Simulator.trajectory_mode': 'bands'}
+    assert load(tmp_path, parameters)['parameters'] == parameters
+
+
+@pytest.mark.parametrize('key', ['Simulator.run_simulation', 'Simulator.__init__', 'Topic.arguments',
+                                 'Simulator.num_topics', 'Voter.total_days'])
+def test_unknown_parameters_are_rejected(tmp_path, key):
+    with pytest.raises(ValueError, match='Unknown scenario parameter'):
+        load(tmp_path, {key: 1})
+
+
+@pytest.mark.parametrize('key, use', [('FactChecker.daily_fact_checks', 'Simulator.num_fact_checks_daily'),
+                                      ('Requester.daily_posts', 'Simulator.requester_daily_posts'),
+                                      ('FactChecker.profile', None), ('FactChecker.rep', None),
+                                      ('Simulator.fact_checkers', None)])
+def test_attributes_set_by_the_simulation_are_rejected(tmp_path, key, use):
+    with pytest.raises(ValueError, match='not a scenario parameter') as error:
+        load(tmp_path, {key: 2})
+    if use is not None:
+        assert use in str(error.value)
+
+
+def test_requester_posting_rates_must_match_requesters(monkeypatch):
+    monkeypatch.setattr(game.Simulator, 'num_requesters', 3)
+    monkeypatch.setattr(game.Simulator, 'requester_daily_posts', [6, 2.5])
+    with pytest.raises(ValueError, match='2 posting rates for 3 requesters'):
+        game.Simulator()
+    monkeypatch.setattr(game.Simulator, 'requester_daily_posts', [6, 2.5, 0.5])
+    assert [r.daily_posts for r in game.Simulator().requesters] == [6, 2.5, 0.5]
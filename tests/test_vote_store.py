@@ -0,0 +1,79 @@
+# VoteStore: settling topics, and dropping settled votes (keep_settled=False)
+import importlib.util
+import os
+import sys
+import types
+
+import numpy as np
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+# (agent, topic, side, eth, rep), topics 0 and 1 are settled first, topic 2 stays open
+VOTES = [(0, 1, True, 0.1, 1.0), (1, 0, False, 0.2, 2.0), (2, 2, True, 0.3, 3.0),
+         (1, 1, False, 0.4, 4.0), (0, 2, False, 0.5, 5.0), (2, 0, True, 0.6, 6.0)]
+
+
+class SmallVoteStore(game.VoteStore):
+    initial_capacity = 2  # adding the votes grows the arrays
+
+
+def store_with_votes(keep_settled):
+    store = SmallVoteStore(keep_settled)
+    for a in range(3):
+        store.register_agent(types.SimpleNamespace(identification=a))
+    for vote in VOTES:
+        store.add(*vote)
+    return store
+
+
+def rows_as_votes(store, rows):
+    return [(int(store.agent[r]), int(store.topic[r]), bool(store.side[r]), float(store.eth[r]), float(store.rep[r]))
+            for r in rows]
+
+
+def test_settled_rows_are_grouped_by_topic_in_voting_order():
+    store = store_with_votes(keep_settled=True)
+    grouped = store.settle_topics([1, 0])
+    assert [rows_as_votes(store, rows) for rows in grouped] == [[VOTES[0], VOTES[3]], [VOTES[1], VOTES[5]]]
+
+    assert not store.has_voted(0, 1) and not store.has_voted(2, 0)
+    assert store.has_voted(2, 2) and store.has_voted(0, 2)
+    np.testing.assert_allclose([store.open_position(a) for a in range(3)], [(0.5, 5.0), (0, 0), (0.3, 3.0)],
+                               atol=1e-12)
+    # Settled votes are kept
+    assert store.topic_vote_counts(3).tolist() == [2, 2, 2]
+
+
+def test_compaction_keeps_only_open_votes():
+    store = store_with_votes(keep_settled=False)
+    store.settle_topics([0, 1])
+    store.add(1, 2, True, 0.7, 7.0)
+    store.add(1, 3, False, 0.8, 8.0)
+    # Compacts first, the votes on topics 0 and 1 are dropped now
+    (rows,) = store.settle_topics([3])
+    assert rows_as_votes(store, rows) == [(1, 3, False, 0.8, 8.0)]
+    assert store.num_votes == 4
+    assert rows_as_votes(store, range(store.num_votes)) == [VOTES[2], VOTES[4], (1, 2, True, 0.7, 7.0),
+                                                            (1, 3, False, 0.8, 8.0)]
+
+    assert {(a, t) for a in range(3) for t in range(4) if store.has_voted(a, t)} == {(2, 2), (0, 2), (1, 2)}
+    np.testing.assert_allclose([store.open_position(a) for a in range(3)], [(0.5, 5.0), (0.7, 7.0), (0.3, 3.0)],
+                               atol=1e-12)
+    # The whole-store queries only see the kept rows
+    assert store.topic_vote_counts(4).tolist() == [0, 0, 3, 1]
+    indptr, topics, _, eth, _ = store.to_csr()
+    assert indptr.tolist() == [0, 1, 3, 4]
+    assert topics.tolist() == [2, 2, 3, 2]
+
+    # Adding votes after compaction reuses the rows and settles them like any other
+    store.add(0, 4, True, 0.9, 9.0)
+    (rows,) = store.settle_topics([2])
+    assert rows_as_votes(store, rows) == [VOTES[2], VOTES[4], (1, 2, True, 0.7, 7.0)]
+    assert store.has_voted(0, 4) and not store.has_voted(0, 2)
+    np.testing.assert_allclose([store.open_position(a) for a in range(3)], [(0.9, 9.0), (0, 0), (0, 0)],
+                               atol=1e-12)
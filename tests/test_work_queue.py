@@ -0,0 +1,155 @@
+# WorkQueue on a local temp directory (the stand-in for a shared filesystem)
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game-theory.py')
+spec = importlib.util.spec_from_file_location('game_theory', SOURCE)
+game = importlib.util.module_from_spec(spec)
+sys.modules['game_theory'] = game
+spec.loader.exec_module(game)
+
+SCENARIO = {'name': 'tiny', 'seed': 1, 'replicates': 2,
+            'parameters': {'Simulator.total_days': 8, 'Simulator.topic_duration': 2},
+            'sweep': {'Simulator.num_fact_checkers': [5, 10]}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return game.WorkQueue(str(tmp_path / 'queue'), lease_seconds=60)
+
+
+def submit_one(queue):
+    queue.submit([{'run': 0, 'seed': 1, 'parameters': {}, 'convergence': None}])
+    return 'unit_000000.json'
+
+
+def age(path, seconds=600):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def fake_result(run):
+    return {'run': run}, np.zeros((3, 5))
+
+
+def test_submit_claim_complete_merge(queue, tmp_path):
+    jobs = game.scenario_jobs(SCENARIO)
+    queue.submit(jobs)
+    queue.submit(jobs)  # submitting again adds nothing
+    assert queue.status()['pending'] == len(jobs)
+
+    assert game.queue_worker(queue.directory, poll_seconds=0) == len(jobs)
+    assert queue.status() == {'pending': 0, 'claimed': 0, 'done': len(jobs),
+                              'failed': 0, 'results': len(jobs)}
+
+    output_dir = str(tmp_path / 'out')
+    assert game.merge_queue_results(queue.directory, output_dir) == len(jobs)
+    with open(os.path.join(output_dir, 'results.jsonl')) as f:
+        summaries = [json.loads(line) for line in f]
+    assert [s['run'] for s in summaries] == list(range(len(jobs)))
+    with np.load(os.path.join(output_dir, 'history.npz')) as history:
+        assert set(history['run'].tolist()) == set(range(len(jobs)))
+
+
+def test_stale_claim_is_requeued(queue):
+    submit_one(queue)
+    name, unit = queue.claim()
+    assert unit['attempts'] == 0
+
+    queue.requeue_stale()  # still within the lease
+    assert queue.status()['claimed'] == 1
+
+    age(queue.path('claimed', name))
+    queue.requeue_stale()
+    assert queue.status()['pending'] == 1
+    name, unit = queue.claim()
+    assert unit['attempts'] == 1
+
+
+def test_unit_fails_after_max_attempts(queue):
+    submit_one(queue)
+    for _ in range(queue.max_attempts):
+        name, _ = queue.claim()
+        age(queue.path('claimed', name))
+        queue.requeue_stale()
+    assert queue.status()['pending'] == 0
+    assert queue.status()['failed'] == 1
+    with open(queue.path('failed', name)) as f:
+        unit = json.load(f)
+    assert unit['attempts'] == queue.max_attempts
+    assert 'error' in unit
+
+
+def test_left_behind_stale_file_is_recovered(queue):
+    name = submit_one(queue)
+    queue.claim()
+    # The requeuing process died right after moving the claim away
+    stale = queue.path('claimed', '.' + name + '.stale')
+    os.rename(queue.path('claimed', name), stale)
+    age(stale)
+    assert queue.status()['claimed'] == 1
+
+    queue.requeue_stale()
+    assert not os.path.exists(stale)
+    assert queue.status()['pending'] == 1
+
+
+def test_duplicate_completion_is_recorded_once(queue):
+    submit_one(queue)
+    # The first worker stalls, its claim expires and a second worker runs the same unit
+    name, _ = queue.claim()
+    age(queue.path('claimed', name))
+    queue.requeue_stale()
+    second_name, _ = queue.claim()
+    assert second_name == name
+
+    queue.complete(name, *fake_result(0))
+    queue.complete(name, {'run': 0, 'copy': 2}, np.ones((3, 5)))
+    assert queue.units('results') == ['unit_000000.npz']
+    summary, columns = game.load_columns(queue.path('results', 'unit_000000.npz'))
+    assert summary == {'run': 0}
+    assert queue.status()['done'] == 1
+
+
+def test_claim_of_long_pending_unit_is_not_stale(queue, monkeypatch):
+    name = submit_one(queue)
+    age(queue.path('pending', name))  # waited in pending for longer than the lease
+
+    # Another worker looks for stale claims right after the claim's rename
+    other = game.WorkQueue(queue.directory, queue.lease_seconds)
+    rename = os.rename
+
+    def rename_then_requeue(source, destination):
+        rename(source, destination)
+        if os.path.dirname(destination) == os.path.dirname(queue.path('claimed', name)):
+            other.requeue_stale()
+    monkeypatch.setattr(os, 'rename', rename_then_requeue)
+
+    claimed, unit = queue.claim()
+    assert claimed == name
+    assert unit['attempts'] == 0
+    assert queue.status()['claimed'] == 1
+    assert queue.status()['pending'] == 0
+
+
+def test_lost_claim_does_not_crash_the_worker(queue):
+    submit_one(queue)
+    name, unit = queue.claim()
+    age(queue.path('claimed', name))
+    queue.requeue_stale()  # another worker takes the claim away
+
+    queue.heartbeat(name)
+    queue.fail(name, unit, 'error')
+    assert queue.status()['failed'] == 0
+    queue.complete(name, *fake_result(0))
+    # The requeued copy is recognised as finished instead of being simulated again
+    assert queue.claim() == (None, None)
+    assert queue.status()['done'] == 1
+    assert queue.status()['pending'] == 0